@@ -61,6 +61,9 @@ with DAG(
     oracle_credentials = Variable.get("oracle_credentials_secret", default_var=False, deserialize_json=True)
     redshift_credentials = Variable.get("redshift_credentials_secret", default_var=False, deserialize_json=True)
 
+    # DynamoDB table with the last loaded value of each table. Without it the windows come from the execution ts
+    watermark_table = Variable.get("watermark_table", default_var=None)
+
     for schema in oracle_schemas:
 
         with TaskGroup(group_id=schema) as db_tg:
@@ -76,7 +79,8 @@ with DAG(
                     "schema": schema,
                     "oracle_credentials": oracle_credentials,
                     "oracle_schema_metadata": oracle_metadata[schema],
-                    "interval": SCHEDULE_INTERVAL
+                    "interval": SCHEDULE_INTERVAL,
+                    "watermark_table": watermark_table
                 }
             )
 
@@ -87,6 +91,13 @@ with DAG(
                 upsert_col = table_metadata[table_name]["upsert_col"]
                 constraint_conflict = table_metadata[table_name]["constraint_conflict"]
 
+                # Tables in "parquet" mode are written straight into the silver bucket by the extraction
+                output_format = table_metadata[table_name].get("output_format", "csv")
+
+                # Large tables can split their window in slices extracted in parallel
+                slices = table_metadata[table_name].get("slices", 1)
+                slice_strategy = table_metadata[table_name].get("slice_strategy", "time")
+
                 extraction_task = AwsLambdaInvokeFunctionOperator(
                     task_id=f"{table_name}_extrac",
                     function_name=functions["extraction"],
@@ -103,27 +114,18 @@ with DAG(
                         "tns": oracle_credentials["tns"],
                         "user": oracle_credentials["user"],
                         "psswd": oracle_credentials["psswd"],
-                        "interval": SCHEDULE_INTERVAL
-                    })
-                )
-
-                transformation_task = AwsLambdaInvokeFunctionOperator(
-                    task_id=f"{table_name}_transform",
-                    function_name=functions["transformation"],
-                    trigger_rule="all_success",
-                    payload=json.dumps({
-                        "source_bucket": BRONZE_BUCKET,
+                        "interval": SCHEDULE_INTERVAL,
+                        "output_format": output_format,
                         "target_bucket": SILVER_BUCKET,
-                        "schema": schema,
-                        "table_name": table_name,
-                        "dt_execution": "{{ ts }}",
-                        "interval": SCHEDULE_INTERVAL
+                        "slices": slices,
+                        "slice_strategy": slice_strategy,
+                        "watermark_table": watermark_table
                     })
                 )
 
                 load_task = AwsLambdaInvokeFunctionOperator(
-                    task_id=f"{table_name}_transform",
-                    function_name=functions["transformation"],
+                    task_id=f"{table_name}_load",
+                    function_name=functions["load"],
                     trigger_rule="all_success",
                     payload=json.dumps({
                         "source_bucket": SILVER_BUCKET,
@@ -136,8 +138,32 @@ with DAG(
                         "port": redshift_credentials["port"],
                         "db": redshift_credentials["db"],
                         "user": redshift_credentials["user"],
-                        "psswd": redshift_credentials["psswd"]
+                        "psswd": redshift_credentials["psswd"],
+                        "watermark_table": watermark_table
                     })
                 )
 
-                start_task >> data_inspect >> extraction_task >> transformation_task >> load_task
+                if output_format == "parquet":
+
+                    # The extraction already wrote the parquet, the transform is not needed
+                    start_task >> data_inspect >> extraction_task >> load_task
+
+                else:
+
+                    transformation_task = AwsLambdaInvokeFunctionOperator(
+                        task_id=f"{table_name}_transform",
+                        function_name=functions["transformation"],
+                        trigger_rule="all_success",
+                        payload=json.dumps({
+                            "source_bucket": BRONZE_BUCKET,
+                            "target_bucket": SILVER_BUCKET,
+                            "schema": schema,
+                            "table_name": table_name,
+                            "dt_execution": "{{ ts }}",
+                            "interval": SCHEDULE_INTERVAL,
+                            # Fixed parquet types, the columns not listed are inferred by the transform
+                            "column_types": table_metadata[table_name].get("column_types")
+                        })
+                    )
+
+                    start_task >> data_inspect >> extraction_task >> transformation_task >> load_task
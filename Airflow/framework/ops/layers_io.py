@@ -1,9 +1,26 @@
-import json
+import io
 import logging
+import time
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
 from datetime import timedelta
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import islice
+from typing import Iterator
+from uuid import uuid4
+from psycopg2 import sql
+from psycopg2.extensions import STATUS_READY
+from psycopg2.extras import execute_values
 from datetime import datetime as dt
 from Airflow.framework.utils.Parquet import Parquet
+from Airflow.framework.utils.fetch_pool import FetchPool
+from Airflow.framework.utils.ndjson import NdjsonDecoder
+from Airflow.framework.utils.batch_writer import NdjsonBatchWriter
+from Airflow.framework.utils.batch_mover import BatchMover
+from Airflow.framework.utils.pg_pool import PostgresPool
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.providers.amazon.aws.hooks import s3
 
@@ -15,7 +32,9 @@ class Bronze:
 
     logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
 
-    def __init__(self, bucket_conn: s3, bucket_name: str):
+    def __init__(
+        self, bucket_conn: s3, bucket_name: str, fetch_workers: int = 16, ordered: bool = True, json_backend: str = None
+    ):
 
         # Bucket connection
         self.bucket_conn = bucket_conn
@@ -23,16 +42,41 @@ class Bronze:
         # Bucket name
         self.bucket_name = bucket_name
 
-    def get_str_data(self, dir: str) -> list:
+        # Pool used to GET the objects concurrently
+        self.fetch_pool = FetchPool(max_workers=fetch_workers, ordered=ordered)
+
+        # Decoder of the NDJSON bodies, the malformed lines are kept in 'self.decoder.malformed'
+        self.decoder = NdjsonDecoder(backend=json_backend)
+
+    def _read_body(self, key: str) -> bytes:
         """
         Description:
-            Accessing data at the Bronze Layer.
+            Reads the whole body of one object from the bucket.
+
+        Args:
+            key: Key of the object.
+
+        Returns:
+            The raw bytes of the object.
+        """
+
+        # Using the Airflow get_key method to get the object
+        obj = self.bucket_conn.get_key(key=key, bucket_name=self.bucket_name)
+
+        # The raw data is stored into the 'Body' key
+        return obj.get()["Body"].read()
+
+    def iter_str_data(self, dir: str, batch_size: int = None) -> Iterator:
+        """
+        Description:
+            Streams the data at the Bronze Layer, object by object.
 
         Args:
             dir: Path to directory where there are unprocessed data.
+            batch_size: Number of records per yielded batch. If None, records are yielded one by one.
 
         Returns:
-            A list with dicts, where there are the data.
+            A generator of dicts, or of lists of dicts with at most 'batch_size' records.
         """
 
         try:
@@ -40,35 +84,42 @@ class Bronze:
             # Getting all file names in the bucket
             file_list = self.bucket_conn.list_keys(bucket_name=self.bucket_name, prefix=dir)
 
-            # Creating a list to load the file names from the specified directory.
-            valid_records = []
+            # Records waiting to fill the current batch
+            batch = []
+
+            # Skipping the directory markers.
+            file_list = [file_name for file_name in file_list if file_name.strip() != "" and not file_name.endswith("/")]
+
+            # Getting the files from the dir, several requests at a time.
+            for file_name, body, error in self.fetch_pool.map(self._read_body, file_list):
+
+                # The error was already logged by the pool, going on with the next file
+                if error is not None:
 
-            # Getting the files from the dir.
-            for file_name in file_list:
+                    continue
 
-                # Verifying that the file name is not empty.
-                if file_name != "" or file_name != " " or file_name != (dir + "/"):
+                # Parsing the whole body at once, the malformed lines go to the decoder side output
+                for record in self.decoder.decode(body=body, source=file_name):
 
-                    # Parsing the JSON, if not possible put it on a specific list and write as Invalid Record
-                    try:
+                    if batch_size is None:
 
-                        # Using the Airflow get_key method to get the object
-                        obj = self.bucket_conn.get_key(key=file_name, bucket_name=self.bucket_name)
+                        yield record
 
-                        # The raw data is stored into the 'Body' key, and the next line, access it
-                        file_to_read = obj.get()["Body"].iter_lines()
+                        continue
 
-                        # Iterating through each file
-                        for line in file_to_read:
+                    batch.append(record)
 
-                            # Appending the line into the valid_records list
-                            valid_records.append(json.loads(line))
+                    # Releasing the batch as soon as it is full
+                    if len(batch) >= batch_size:
 
-                    except Exception as error:
+                        yield batch
 
-                        logging.error(error)
+                        batch = []
 
-            return valid_records
+            # Releasing the last, incomplete, batch
+            if batch:
+
+                yield batch
 
         except Exception as error:
 
@@ -76,14 +127,62 @@ class Bronze:
 
             raise RuntimeError(error)
 
-    def write_data(self, dataset: list, dir: str) -> bool:
+    def iter_arrow_data(self, dir: str) -> Iterator:
+        """
+        Description:
+            Streams the data at the Bronze Layer as columnar tables, one per object.
+
+        Args:
+            dir: Path to directory where there are unprocessed data.
+
+        Returns:
+            A generator of pyarrow Tables.
+        """
+
+        # Getting all file names in the bucket, without the directory markers
+        file_list = [
+            file_name for file_name in self.bucket_conn.list_keys(bucket_name=self.bucket_name, prefix=dir)
+            if file_name.strip() != "" and not file_name.endswith("/")
+        ]
+
+        for file_name, body, error in self.fetch_pool.map(self._read_body, file_list):
+
+            if error is None:
+
+                yield self.decoder.decode_table(body=body, source=file_name)
+
+    def get_str_data(self, dir: str) -> list:
+        """
+        Description:
+            Accessing data at the Bronze Layer.
+
+        Args:
+            dir: Path to directory where there are unprocessed data.
+
+        Returns:
+            A list with dicts, where there are the data.
+        """
+
+        return list(self.iter_str_data(dir=dir))
+
+    def write_data(
+        self,
+        dataset: list,
+        dir: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_records: int = None,
+        compression: str = None
+    ) -> bool:
         """
         Description:
             To write data at the Raw Zone, in a specific directory.
 
         Args:
-            dataset: A list of objects of any type.
+            dataset: An iterable of records (dicts, JSON strings or file objects).
             dir: Path to directory where the data will write.
+            max_bytes: Maximum size, before compression, of each written object.
+            max_records: Maximum number of records of each written object.
+            compression: None, 'gzip' or 'zstd'.
 
         Returns:
             A True value or raise an error.
@@ -91,14 +190,19 @@ class Bronze:
 
         try:
 
-            for obj in dataset:
+            # Packing the records into a few NDJSON objects with unique keys
+            with NdjsonBatchWriter(
+                bucket_conn=self.bucket_conn,
+                bucket_name=self.bucket_name,
+                dir=dir,
+                max_bytes=max_bytes,
+                max_records=max_records,
+                compression=compression
+            ) as writer:
+
+                writer.write_many(dataset)
 
-                # Saves object file in S3 bucket
-                self.bucket_conn.load_file_obj(
-                    file_obj=obj,
-                    key=dir,
-                    bucket_name=self.bucket_name
-                )
+            logging.info(f"{len(writer.keys)} objects were written in '{dir}'.")
 
             return True
 
@@ -116,54 +220,70 @@ class Silver:
 
     logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
 
-    def __init__(self, bucket_conn: s3, aurora_conn: PostgresHook):
+    def __init__(self, bucket_conn: s3, aurora_conn: PostgresHook, use_pool: bool = False, pool_options: dict = None):
 
         self.bucket_conn = bucket_conn
 
-        self.aurora_conn = aurora_conn.get_conn()
+        if use_pool:
+
+            # Connections shared by the tasks of the worker process, checked out by 'connection'
+            self.pool = PostgresPool.for_hook(aurora_conn, **(pool_options or {}))
+
+            self.aurora_conn = None
 
-    def get_np_trusted_data(self, trusted_bucket_name: str, trusted_dir: str) -> pd.DataFrame:
+        else:
+
+            self.pool = None
+
+            self.aurora_conn = aurora_conn.get_conn()
+
+    @contextmanager
+    def connection(self):
         """
         Description:
-            Get the raw data from trusted zone.
-
-        Args:
-            trusted_bucket_name: Trusted bucket name.
-            trusted_dir: Directory name in the trusted bucket with the not processed data.
+            Gives the Aurora connection to be used, a pooled one when the pool is enabled.
 
         Returns:
-            Dataframe with not processed data.
+            A psycopg2 connection.
         """
 
-        try:
+        if self.pool is None:
 
-            # Getting the list of files
-            file_list = self.bucket_conn.list_keys(bucket_name=trusted_bucket_name, prefix=trusted_dir)
+            yield self.aurora_conn
 
-            # Cleaning the file list, dropping the directories strings
-            file_list = [file for file in file_list if not file.endswith("/")]
+        else:
 
-            # Dataframe to append.
-            not_processed_data = pd.DataFrame()
+            with self.pool.connection() as conn:
 
-            # Converts parquets into dataframe.
-            for file in file_list:
+                yield conn
 
-                # Getting the file name.
-                file = file.split("/")[-1]
+    def get_np_trusted_data(
+        self, trusted_bucket_name: str, trusted_dir: str, columns: list = None, filter=None
+    ) -> pd.DataFrame:
+        """
+        Description:
+            Get the raw data from trusted zone.
 
-                # Converts parquet into dataframe.
-                data = Parquet().parquet_to_df(
-                    bucket_conn=self.bucket_conn,
-                    bucket_name=trusted_bucket_name,
-                    dir=trusted_dir,
-                    parquet_name=file
-                )
+        Args:
+            trusted_bucket_name: Trusted bucket name.
+            trusted_dir: Directory name in the trusted bucket with the not processed data.
+            columns: It's optional, a list of columns to be read.
+            filter: It's optional, an Arrow expression to filter the rows, e.g. ds.field("id") > 10.
 
-                # Append data into dataframe.
-                not_processed_data = not_processed_data.append(data, ignore_index=True)
+        Returns:
+            Dataframe with not processed data.
+        """
 
-            return not_processed_data
+        try:
+
+            # Scanning all the parquets of the directory at once.
+            return Parquet().read_dataset(
+                bucket_conn=self.bucket_conn,
+                bucket_name=trusted_bucket_name,
+                dir=trusted_dir,
+                columns=columns,
+                filter=filter
+            )
 
         except Exception as error:
 
@@ -185,42 +305,217 @@ class Silver:
             return some value if the parameter 'return_value' it's true, else just True value.
         """
 
-        try:
+        with self.connection() as conn:
 
-            # Instancing the cursor
-            cursor = self.aurora_conn.cursor()
+            try:
 
-            if return_value:
+                # Instancing the cursor
+                cursor = conn.cursor()
 
                 # Executing the query
                 cursor.execute(query, tuple(values))
 
+                # Fetching before the cursor is closed
+                result = cursor.fetchall() if return_value else True
+
                 # Commiting the data inserted
-                self.aurora_conn.commit()
+                conn.commit()
 
                 # Closing the cursor
                 cursor.close()
 
-                return cursor.fetchall()
+                return result
 
-            else:
+            except Exception as error:
 
-                # Commiting the data inserted
-                self.aurora_conn.commit()
+                conn.rollback()
+
+                logging.critical(error)
+
+                raise ValueError("Error at insert data into Refined Zone:", error)
+
+    def send_bulk(
+        self,
+        schema: str,
+        table: str,
+        data,
+        conflict_columns: list,
+        columns: list = None,
+        batch_size: int = 10000,
+        method: str = "values"
+    ) -> dict:
+        """
+        Description:
+            Upserts many rows into the Refined Zone. The rows are loaded into a temporary staging table
+            and merged into the target in a single transaction.
+
+        Args:
+            schema: the name of the schema.
+            table: the name of the target table.
+            data: a dataframe, or an iterable of tuples ordered as 'columns'.
+            conflict_columns: columns of the unique constraint used to match the existing rows.
+            columns: names of the columns, required when 'data' is not a dataframe.
+            batch_size: number of rows sent to the staging table per round trip.
+            method: 'values' for multi-row INSERT (execute_values) or 'copy' for COPY FROM STDIN.
+
+        Returns:
+            Dict with the number of 'rows', the 'seconds' spent and the 'rows_per_second'.
+        """
+
+        if method not in ("values", "copy"):
+
+            raise ValueError(f"Method '{method}' is not supported. Use 'values' or 'copy'.")
+
+        with self.connection() as conn:
+
+            try:
+
+                if isinstance(data, pd.DataFrame):
+
+                    columns = list(data.columns)
+
+                    # Sending NaN and NaT as NULL
+                    data = data.astype(object).where(pd.notnull(data), None).itertuples(index=False, name=None)
+
+                elif columns is None:
+
+                    raise ValueError("The 'columns' parameter is required when 'data' is not a dataframe.")
+
+                rows = iter(data)
+
+                target = sql.Identifier(schema, table)
+                stage = sql.Identifier(f"stage_{table}")
+                column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+                key_list = sql.SQL(", ").join(map(sql.Identifier, conflict_columns))
+
+                start = time.monotonic()
+                total = 0
+
+                cursor = conn.cursor()
+
+                # The staging table lives only until the commit
+                cursor.execute(
+                    sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(stage, target)
+                )
+
+                insert_query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(stage, column_list).as_string(cursor)
+                copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(stage, column_list)
+
+                while True:
+
+                    batch = list(islice(rows, batch_size))
+
+                    if not batch:
+
+                        break
+
+                    if method == "copy":
+
+                        buffer = io.StringIO()
+
+                        # Only NULL is written as the unquoted \N, so empty strings and "\N" texts are kept
+                        buffer.writelines(",".join(self._copy_field(value) for value in row) + "\n" for row in batch)
+
+                        buffer.seek(0)
+
+                        cursor.copy_expert(copy_query, buffer)
+
+                    else:
+
+                        execute_values(cursor, insert_query, batch, page_size=len(batch))
+
+                    total += len(batch)
+
+                    logging.info(f"{total} rows staged, {total / (time.monotonic() - start):.0f} rows/s.")
+
+                updates = [column for column in columns if column not in conflict_columns]
+
+                if updates:
+
+                    on_conflict = sql.SQL("DO UPDATE SET {}").format(
+                        sql.SQL(", ").join(
+                            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column)) for column in updates
+                        )
+                    )
+
+                else:
+
+                    on_conflict = sql.SQL("DO NOTHING")
+
+                # Keeping the last staged row of each key, a key can not be updated twice in the same statement
+                cursor.execute(
+                    sql.SQL(
+                        "INSERT INTO {target} ({columns}) "
+                        "SELECT DISTINCT ON ({keys}) {columns} FROM {stage} ORDER BY {keys}, ctid DESC "
+                        "ON CONFLICT ({keys}) {on_conflict}"
+                    ).format(target=target, columns=column_list, keys=key_list, stage=stage, on_conflict=on_conflict)
+                )
+
+                conn.commit()
 
-                # Closing the cursor
                 cursor.close()
 
-                # Executing the query
-                cursor.execute(query, tuple(values))
+                seconds = time.monotonic() - start
 
-                return True
+                report = {"rows": total, "seconds": seconds, "rows_per_second": total / seconds if seconds else 0.0}
 
-        except Exception as error:
+                logging.info(f"{total} rows were upserted into {schema}.{table} in {seconds:.2f}s.")
 
-            logging.critical(error)
+                return report
 
-            raise ValueError("Error at insert data into Refined Zone:", error)
+            except Exception as error:
+
+                conn.rollback()
+
+                logging.critical(error)
+
+                raise ValueError("Error at insert data into Refined Zone:", error)
+
+    @staticmethod
+    def _copy_field(value) -> str:
+        """
+        Description:
+            Formats one value as a field of the COPY csv.
+
+        Args:
+            value: the value to be formatted.
+
+        Returns:
+            The unquoted NULL marker, bytes in the bytea hex format, numbers as they are and the other values quoted.
+        """
+
+        if value is None or value != value:
+
+            return "\\N"
+
+        if isinstance(value, (bytes, bytearray, memoryview)):
+
+            return "\\x" + bytes(value).hex()
+
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+
+            return str(value)
+
+        return '"' + str(value).replace('"', '""') + '"'
+
+    @staticmethod
+    def _select_query(schema: str, table: str, columns: list = None) -> sql.Composed:
+        """
+        Description:
+            Creates the SELECT query, with the columns as SQL identifiers.
+
+        Args:
+            schema: the name of the schema.
+            table: the name of the table.
+            columns: It's optional, a list of columns to be selected.
+
+        Returns:
+            The composed query.
+        """
+
+        projection = sql.SQL(", ").join(map(sql.Identifier, columns)) if columns else sql.SQL("*")
+
+        return sql.SQL("SELECT {} FROM {}").format(projection, sql.Identifier(schema, table))
 
     def read_data(self, schema: str, table: str, cursor, columns=None) -> pd.DataFrame:
         """
@@ -239,44 +534,85 @@ class Silver:
 
         try:
 
-            # Checking if the 'column' parameter it's empty or not
-            if columns is not None:
+            # Creating the cursor once, so the rows are fetched from the cursor that ran the query
+            db_cursor = cursor()
 
-                # Number of columns
-                number_cols = len(columns)
+            # Executing the query
+            db_cursor.execute(self._select_query(schema=schema, table=table, columns=columns))
 
-                # Creating the columns string
-                formatted_columns = "".join(["%s, " if i != number_cols - 1 else "%s" for i in range(0, number_cols)])
+            # Transforming the data into a dataframe
+            df_ready = pd.DataFrame(db_cursor.fetchall(), columns=[column[0] for column in db_cursor.description])
 
-                # Creating the SQL query
-                query = f"SELECT {formatted_columns} FROM {schema}.{table};"
+            return df_ready
 
-                # Executing the query
-                cursor().execute(query)
+        except Exception as error:
 
-                # Transforming the data into a dataframe
-                df_ready = pd.DataFrame(cursor().fetchall())
+            logging.critical(error)
 
-                return df_ready
+            raise ValueError("Error:", error)
 
-            else:
+    def stream_data(
+        self, schema: str, table: str, columns: list = None, chunk_size: int = 10000, as_arrow: bool = False
+    ) -> Iterator:
+        """
+        Description:
+            Streams data from the Refined Zone through a server-side cursor, so the table is never
+            held in memory at once.
 
-                # Creating the SQL query
-                query = f"SELECT * FROM {schema}.{table};"
+        Args:
+            schema: the name of the schema.
+            table: the name of the table where it contains the data.
+            columns: It's optional, a list of columns to be selected in the table.
+            chunk_size: number of rows of each chunk, also used as the cursor 'itersize'.
+            as_arrow: if True yields pyarrow RecordBatches, else dataframes.
 
-                # Executing the query
-                cursor().execute(query)
+        Returns:
+            A generator of dataframes or RecordBatches with at most 'chunk_size' rows.
+        """
 
-                # Transforming the data into a dataframe
-                df_ready = pd.DataFrame(cursor().fetchall())
+        with self.connection() as conn:
 
-                return df_ready
+            try:
 
-        except Exception as error:
+                # Only ending the transaction if it was opened by this read
+                idle = conn.status == STATUS_READY
 
-            logging.critical(error)
+                # Named cursors are kept on the server and the rows are transferred on demand
+                cursor = conn.cursor(name=f"stream_{schema}_{table}_{uuid4().hex[:8]}")
+                cursor.itersize = chunk_size
 
-            raise ValueError("Error:", error)
+                cursor.execute(self._select_query(schema=schema, table=table, columns=columns))
+
+                try:
+
+                    while True:
+
+                        rows = cursor.fetchmany(chunk_size)
+
+                        if not rows:
+
+                            break
+
+                        names = [column[0] for column in cursor.description]
+
+                        chunk = pd.DataFrame(rows, columns=names)
+
+                        yield pa.RecordBatch.from_pandas(chunk, preserve_index=False) if as_arrow else chunk
+
+                finally:
+
+                    cursor.close()
+
+                    # Ending the read transaction opened by the named cursor
+                    if idle:
+
+                        conn.rollback()
+
+            except Exception as error:
+
+                logging.critical(error)
+
+                raise ValueError("Error:", error)
 
 class Golden(Parquet):
     """
@@ -286,7 +622,15 @@ class Golden(Parquet):
 
     logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
 
-    def __init__(self, bucket_conn: s3, bucket_name: str):
+    def __init__(
+        self,
+        bucket_conn: s3,
+        bucket_name: str,
+        fetch_workers: int = 16,
+        ordered: bool = True,
+        json_backend: str = None,
+        use_cache: bool = False
+    ):
 
         super().__init__()
 
@@ -296,7 +640,21 @@ class Golden(Parquet):
         # Name of the bucket
         self.bucket_name = bucket_name
 
-    def write_data(self, dir: str, parquet_name: str, data: dict, exclude_columns: list = None) -> bool:
+        # Pool used to GET the objects concurrently
+        self.fetch_pool = FetchPool(max_workers=fetch_workers, ordered=ordered)
+
+        # Decoder of the NDJSON bodies, the malformed lines are kept in 'self.decoder.malformed'
+        self.decoder = NdjsonDecoder(backend=json_backend)
+
+        # Reusing the cached directory manifests in the existence checks
+        self.use_cache = use_cache
+
+        # Engine archiving the processed bronze files
+        self.mover = BatchMover(bucket_conn=bucket_conn, max_workers=fetch_workers)
+
+    def write_data(
+        self, dir: str, parquet_name: str, data: dict, exclude_columns: list = None, mode: str = "rewrite"
+    ) -> bool:
         """
         Description:
             Writes records in the parquet file from Bucket S3.
@@ -306,6 +664,9 @@ class Golden(Parquet):
             parquet_name: Name of the parquet file.
             data: Data in dict format.
             exclude_columns: Columns to be excluded from dataframe.
+            mode: 'rewrite' merges the records into a single parquet file, 'append' writes them
+                as a new part file under '{dir}{parquet_name}/'. Once the parquet has parts, 'rewrite'
+                also appends.
 
         Returns:
             A True value or raise an error.
@@ -318,13 +679,41 @@ class Golden(Parquet):
 
         try:
 
-            # Checking if parquet file exists.
-            checker = self.check_parquet_file(
-                bucket_conn=self.bucket_conn,
-                bucket_name=self.bucket_name,
-                dir=dir,
-                parquet_name=parquet_name
-            )
+            if mode != "append":
+
+                # Checking if parquet file exists.
+                checker = self.check_parquet_file(
+                    bucket_conn=self.bucket_conn,
+                    bucket_name=self.bucket_name,
+                    dir=dir,
+                    parquet_name=parquet_name,
+                    use_cache=self.use_cache
+                )
+
+                # Without the flat file, a dataset of parts written by 'append' would be hidden by a new one.
+                if not checker and self._part_keys(
+                    bucket_conn=self.bucket_conn,
+                    bucket_name=self.bucket_name,
+                    dir=dir,
+                    parquet_name=parquet_name,
+                    use_cache=self.use_cache
+                ):
+
+                    # Log message.
+                    logging.warning(f"'{parquet_name}' is a dataset of parts, the records are appended as a new part.")
+
+                    mode = "append"
+
+            if mode == "append":
+
+                # Writing only the new records, the existing parts are not read.
+                return self.append_part(
+                    bucket_conn=self.bucket_conn,
+                    bucket_name=self.bucket_name,
+                    dir=dir,
+                    data=pd.DataFrame(data).drop(columns=exclude_columns).to_dict(),
+                    parquet_name=parquet_name
+                )
 
             # Removing columns from data.
             data = pd.DataFrame(data).drop(columns=exclude_columns)
@@ -367,7 +756,39 @@ class Golden(Parquet):
             # Log message.
             logging.critical(error)
 
-    def read_parquet(self, bucket_name: str, dir: str, start_date: str, end_date: str) -> pd.DataFrame:
+    @staticmethod
+    def _typed_bound(value: str, arrow_type: pa.DataType):
+        """
+        Description:
+            Converts a date string into an Arrow scalar comparable with a column.
+
+        Args:
+            value: Date in 'YYYY-MM-DD' format.
+            arrow_type: Type of the column.
+
+        Returns:
+            Arrow scalar.
+        """
+
+        if pa.types.is_timestamp(arrow_type):
+
+            timestamp = pd.Timestamp(value)
+
+            if arrow_type.tz is not None:
+
+                timestamp = timestamp.tz_localize(arrow_type.tz)
+
+            return pa.scalar(timestamp, type=arrow_type)
+
+        if pa.types.is_date(arrow_type):
+
+            return pa.scalar(pd.Timestamp(value).date(), type=arrow_type)
+
+        return pa.scalar(value, type=arrow_type)
+
+    def read_parquet(
+        self, bucket_name: str, dir: str, start_date: str, end_date: str, columns: list = None
+    ) -> pd.DataFrame:
         """
         Description:
             Reads the parquet according to a range of dates.
@@ -377,6 +798,7 @@ class Golden(Parquet):
             dir: Name of the directory in S3 bucket.
             start_date: Filter start date.
             end_date: Filter end date.
+            columns: It's optional, a list of columns to be read.
 
         Returns:
             Filtered dataframe.
@@ -391,26 +813,43 @@ class Golden(Parquet):
             dates = pd.date_range(start=start_date, end=end_date)
 
             # Parquet name.
-            parquets = set(str(date)[:7] for date in dates)
+            parquets = sorted(set(str(date)[:7] for date in dates))
 
-            # Dataframe to store the data.
-            data = pd.DataFrame()
+            filesystem = self.s3_filesystem(self.bucket_conn)
 
-            # Getting the data from bucket.
-            for parquet in parquets:
+            # The month may be a single file or a directory of parts written in append mode.
+            files = []
 
-                parquet_data = self.parquet_to_df(
-                    bucket_conn=self.bucket_conn,
-                    bucket_name=bucket_name,
-                    dir=dir,
-                    parquet_name=parquet
-                )
+            for info in filesystem.get_file_info([f"{bucket_name}/{dir}{parquet}" for parquet in parquets]):
+
+                if info.type == fs.FileType.File:
 
-                # Appending the data into the parquet file
-                data = data.append(parquet_data, ignore_index=True)
+                    files.append(info.path)
 
-            # Filtering the data.
-            data = data[(data.trusted >= start_date) & (data.trusted <= end_date)]
+                elif info.type == fs.FileType.Directory:
+
+                    files.extend(
+                        part.path for part in filesystem.get_file_info(fs.FileSelector(info.path, recursive=True))
+                        if part.type == fs.FileType.File and part.path.endswith(".parquet")
+                    )
+
+            if not files:
+
+                # Log message.
+                logging.info("There is no parquet in the range of dates entered.")
+
+                return pd.DataFrame(columns=columns)
+
+            # The month files are read in parallel.
+            dataset = self.open_dataset(files, filesystem=filesystem)
+
+            trusted_type = dataset.schema.field("trusted").type
+
+            # Row groups whose 'trusted' statistics are out of the range are not read.
+            date_filter = (ds.field("trusted") >= self._typed_bound(start_date, trusted_type)) & \
+                          (ds.field("trusted") <= self._typed_bound(end_date, trusted_type))
+
+            data = dataset.to_table(columns=columns, filter=date_filter, use_threads=True).to_pandas()
 
             # Log message.
             logging.info("Data were filtered according to the dates entered.")
@@ -453,49 +892,29 @@ class Golden(Parquet):
             # List to write records.
             valid_dicts = []
 
-            for file in file_list:
-
-                # Getting the object and reading it.
-                obj = self.bucket_conn.get_key(key=file, bucket_name=bronze_bucket)
-
-                # Iterating the records into rows.
-                file_to_read = obj.get()["Body"].iter_lines()
+            # Reads the whole body of one object.
+            def read_body(key: str) -> bytes:
 
-                # Iterating through each file.
-                for line in file_to_read:
+                return self.bucket_conn.get_key(key=key, bucket_name=bronze_bucket).get()["Body"].read()
 
-                    # Appending the line into the valid_records list.
-                    valid_dicts.append(json.loads(line))
+            # Getting the objects, several requests at a time.
+            for file, body, error in self.fetch_pool.map(read_body, file_list):
 
-                # Getting the source URL file.
-                source_obj_url = "s3://" + bronze_bucket + "/" + file
+                # Stopping the read, as before, when one object can not be fetched.
+                if error is not None:
 
-                # Removing the name of the directories from filename.
-                new_file = file.split("/")[-1]
+                    raise error
 
-                # Getting the destiny URL file.
-                dir_destiny = "s3://" + bronze_bucket + "/" + processed_dir + new_file
+                # Parsing the whole body at once, the malformed lines go to the decoder side output.
+                valid_dicts.extend(self.decoder.decode(body=body, source=file))
 
-                self.bucket_conn.copy_object(
-                    source_bucket_key=source_obj_url,
-                    dest_bucket_key=dir_destiny
-                )
-
-                # Verify that the file has been successfully copied to the destination directory.
-                if self.bucket_conn.check_for_key(key=f"{processed_dir}{new_file}", bucket_name=bronze_bucket):
+            # Archiving the files read, with concurrent copies and batched deletes.
+            report = self.mover.move(bucket_name=bronze_bucket, keys=file_list, dest_dir=processed_dir)
 
-                    # Deleting the records already treated.
-                    self.bucket_conn.delete_objects(bucket=bronze_bucket, keys=file)
+            # The files not moved stay in the source.
+            if report["failed"]:
 
-                    # Log success message.
-                    #log.info(f"File {new_file} has been saved to destination and removed from source.")
-
-                else:
-
-                    # Log error message.
-                    logging.error(
-                        f"File {new_file} is not in the destination, so it has not been removed from the source."
-                    )
+                logging.error(f"{len(report['failed'])} files were not moved to '{processed_dir}'.")
 
             # Log message.
             logging.info("Records have been saved to the list.")
@@ -509,23 +928,42 @@ class Golden(Parquet):
 
             raise ValueError("Unable to get the data. Error:", error)
 
-    def apollo_processed_at(self, data: list) -> list:
+    def apollo_processed_at(self, data):
         """
         Description:
-            Add value corresponding to timestamp from recording.
+            Add value corresponding to timestamp from recording. The whole batch gets the same timestamp.
 
         Args:
-            data: Data that will receive the timestamp marking.
+            data: Data that will receive the timestamp marking, a pandas Dataframe, a pyarrow Table or a list of dicts.
 
         Returns:
-            List with the timestamp values for all rows to be recorded into the parquet file.
+            The data, of the same type, with the 'apollo-processed-at' column.
         """
 
-        for i in range(len(data)):
+        # A single timestamp for the batch.
+        processed_at = str(dt.utcnow())
 
-            # Add timestamp value.
-            data[i]["apollo-processed-at"] = str(dt.utcnow())
+        if isinstance(data, pd.DataFrame):
 
-        return data
+            # Broadcasting the value to the whole column at once.
+            return data.assign(**{"apollo-processed-at": processed_at})
+
+        if isinstance(data, pa.Table):
 
+            column = pa.repeat(pa.scalar(processed_at), data.num_rows)
 
+            # Replacing the column if it already exists.
+            if "apollo-processed-at" in data.column_names:
+
+                return data.set_column(
+                    data.column_names.index("apollo-processed-at"), "apollo-processed-at", column
+                )
+
+            return data.append_column("apollo-processed-at", column)
+
+        for record in data:
+
+            # Add timestamp value.
+            record["apollo-processed-at"] = processed_at
+
+        return data
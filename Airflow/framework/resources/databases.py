@@ -4,7 +4,7 @@ import psycopg2
 import logging
 
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from logger import Logger
+from logger.loader import load_logging
 
 load_logging()
 logger = logging.getLogger('base')
@@ -373,4 +373,5 @@ class Dynamo:
             response = self.table.get_item(Key=key)
         except ClientError as error:
             self.logger.error("Failed to retrieve data: %s", error.response["Error"]["Message"])
+            raise
         return response
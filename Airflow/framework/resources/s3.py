@@ -1,15 +1,29 @@
 import io
+import csv
+import gzip
+import json
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from urllib.parse import unquote_plus
 from dateutil import parser
 import logging
 import boto3
 from logger.loader import load_logging
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
 load_logging()
 logger = logging.getLogger('base')
 s3_client = boto3.client("s3", region_name="us-east-1")
 s3_session = boto3.Session().resource('s3')
 
+# upper bounds, in bytes, of the size histogram buckets
+SIZE_BINS = [1024, 1024**2, 16*1024**2, 128*1024**2, 1024**3]
+
 class S3():
 
     def __init__(self):
@@ -18,7 +32,13 @@ class S3():
 
     @staticmethod
     def get_files_statitics(
-        bucket: str, dataset: str, table: str, subfolder: str
+        bucket: str,
+        dataset: str,
+        table: str,
+        subfolder: str,
+        max_workers=8,
+        inventory_manifest=None,
+        details=False
     ):
         """ Gets the amount of data and files that will be processed.
 
@@ -27,41 +47,51 @@ class S3():
             dataset (str): dataset name
             table (str): table name
             subfolder (list(str)): the subfolders of table
+            max_workers (int): subfolders listed at the same time.
+            inventory_manifest (str): s3:// path of the manifest.json of an
+                S3 Inventory report (CSV or Parquet) of the bucket. When given
+                the report is read instead of listing the subfolders.
+            details (bool): return the statistics of each subfolder as well.
+
+        Returns:
+            (total, size), or when details is True a dict with the "total",
+            the "size" and the "folders", each one with its "total", "size"
+            and "histogram" of file sizes.
         """
 
-        size = 0
-        total = 0
-        for folder in subfolder:
-
-            request = s3_client.list_objects(
-                Bucket=bucket,
-                Prefix=folder
-            )
-            try:
-                # sometimes the response comes with data of the folder
-                first_element = request["Contents"][0]["Key"].replace("/", "")
-                if first_element == folder.replace("/", ""):
-                    size_list = [
-                        int(i["Size"]) for i in request["Contents"][1:]
-                    ]
-                else:
-                    size_list = [int(i["Size"]) for i in request["Contents"]]
-            except:
-                # if it came to this except it means that there is no folder
-                # or file in the path
+        if inventory_manifest:
+            folders = _read_inventory(inventory_manifest, subfolder)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                folders = dict(zip(
+                    subfolder,
+                    executor.map(lambda i: _scan_folder(bucket, i), subfolder)
+                ))
+
+        for folder, stats in folders.items():
+            if stats["total"] == 0:
                 logger.warning("No folder of file in the path."
                               f"\t Bucket: {bucket} \t Prefix: {folder}"
                 )
 
-                return 0, 0
+        total = sum(i["total"] for i in folders.values())
+        size = sum(i["size"] for i in folders.values())
 
-            size += sum(size_list)
-            total += len(size_list)
+        if details:
+            return {"total": total, "size": size, "folders": folders}
 
         return total, size
 
     @staticmethod
-    def get_key(bucket: str, folder: str, all_data=True):
+    def get_key(
+        bucket: str,
+        folder: str,
+        all_data=True,
+        depth=1,
+        start_date=None,
+        end_date=None,
+        max_workers=8
+    ):
         """ Get all the bucket keys inside one specific folder.
 
         Args:
@@ -69,35 +99,80 @@ class S3():
             folder (str): subfolder.
             all_data (bool): specify if you want to all the keys inside the
                 folder(True) or just the child directorys(False). Default: True
+            depth (int): levels below the folder of the returned directorys,
+                only when all_data is False. Default: 1
+            start_date (str|datetime): only the directorys whose name is a
+                timestamp after or equal to this one, when all_data is False.
+            end_date (str|datetime): only the directorys whose name is a
+                timestamp before or equal to this one, when all_data is False.
+            max_workers (int): sibling directorys listed at the same time.
         """
 
+        if all_data:
+            try:
+                keys = []
+                for objects in s3_session.Bucket(bucket)\
+                    .objects.filter(Prefix=folder):
+                    keys.append(objects.key)
+            except Exception as e:
+                logger.error("Error while listing bucket: (%s) with the prefix: "
+                            "(%s). Error: (%s)", bucket, folder, str(e))
+                raise
+
+            return keys
+
+        if folder and not folder.endswith("/"):
+            folder += "/"
+
+        # each level is listed with one request per directory, so the cost
+        # follows the number of directorys instead of the number of files
+        folders = [folder]
         try:
-            keys = []
-            for objects in s3_session.Bucket(bucket)\
-                .objects.filter(Prefix=folder):
-                keys.append(objects.key)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for _ in range(depth):
+                    folders = [
+                        child
+                        for children in executor.map(
+                            lambda prefix: _list_folders(bucket, prefix),
+                            folders
+                        )
+                        for child in children
+                    ]
         except Exception as e:
             logger.error("Error while listing bucket: (%s) with the prefix: "
                         "(%s). Error: (%s)", bucket, folder, str(e))
             raise
 
-        if all_data:
-            return keys
+        if start_date is None and end_date is None:
+            return folders
 
-        # get just the folder
-        folders = []
-        for key in keys:
-            end = key.rsplit("/")[-1]
-            if end == "":
-                # it means that is a folder
-                folders.append(key)
-            else:
-                folders.append(key.replace(end, ""))
+        if isinstance(start_date, str):
+            start_date = _parse_folder_timestamp(start_date)
+        if isinstance(end_date, str):
+            end_date = _parse_folder_timestamp(end_date)
 
-        # removing duplicates
-        folders = list(set(folders))
+        # filtering by the timestamp in the directory name
+        filtered = []
+        for i in folders:
+            try:
+                folder_date = _parse_folder_timestamp(
+                    i.rstrip("/").rsplit("/", 1)[-1]
+                )
+            except Exception:
+                logger.warning(
+                    "There is a folder not in the datalake supported "
+                    f"pattern.\t Folder: {i}"
+                )
+                continue
 
-        return folders
+            if start_date is not None and folder_date < start_date:
+                continue
+            if end_date is not None and folder_date > end_date:
+                continue
+
+            filtered.append(i)
+
+        return filtered
 
     @staticmethod
     def get_buckets_to_process(
@@ -107,7 +182,8 @@ class S3():
         table: str,
         timestamp: str,
         target_table=None,
-        all_files=False
+        all_files=False,
+        use_manifest=False
     ):
         """ Look for the files that need to be processed
 
@@ -121,6 +197,11 @@ class S3():
                 will use table as target as well.
             all_files (bool): Return all the files that are different from
                 target.
+            use_manifest (bool): read the processed folders from the
+                partition manifest of the target, written by mark_processed,
+                instead of listing the target. A missing or empty manifest,
+                or one older than the newest origin folder, is rebuilt from
+                the target listing.
         """
 
         # dict that map the amount of seconds in each period
@@ -136,10 +217,8 @@ class S3():
             prefix += '/'
 
         try:
-            origin_request = []
-            for objects in s3_session.Bucket(s3_origin)\
-                .objects.filter(Prefix=prefix):
-                origin_request.append(objects.key)
+            # only the timestamp folders are listed, not their files
+            origin_request = _list_folders(s3_origin, prefix)
         except Exception as e:
             logger.error("Error while listing bucket: (%s) with the prefix: "
                         "(%s). Error: (%s)", s3_origin, prefix, str(e))
@@ -152,15 +231,42 @@ class S3():
 
         if not prefix_target.endswith('/'):
             prefix_target += '/'
-        try:
+
+        manifest_key = _manifest_key(dataset, target_table or table)
+
+        # getting values that are not in the origin
+        originn, otime = _get_data_folders(origin_request)
+
+        target_request = None
+        if use_manifest:
+            processed = _read_manifest(s3_target, manifest_key)
+            # an empty manifest is as good as a missing one
+            if processed:
+                target_request = [f"{prefix_target}{i}/" for i in processed]
+                _, mtime = _get_data_folders(target_request)
+                # the target may have been written without mark_processed,
+                # so a manifest behind the origin is refreshed by a listing
+                if otime and (not mtime or max(otime) > max(mtime)):
+                    logger.info(
+                        f"Manifest {s3_target}/{manifest_key} is older than "
+                        f"the origin, listing the target again"
+                    )
+                    target_request = None
+
+        if target_request is None:
             target_request = []
-            for objects in s3_session.Bucket(s3_target)\
-                .objects.filter(Prefix=prefix):
-                target_request.append(objects.key)
-        except Exception as e:
-            logger.warning(
-                    " The target bucket: (%s) or prefix: (%s) may not exist"
-                    " exception occurs: (%s)", s3_origin, prefix, str(e)
+            try:
+                target_request = _list_folders(s3_target, prefix_target)
+            except Exception as e:
+                logger.warning(
+                        " The target bucket: (%s) or prefix: (%s) may not exist"
+                        " exception occurs: (%s)", s3_target, prefix_target, str(e)
+                    )
+
+            if use_manifest and len(target_request) > 0:
+                _write_manifest(
+                    s3_target, manifest_key,
+                    [i.rstrip("/").rsplit("/", 1)[-1] for i in target_request]
                 )
 
         # verify if bucket target exist
@@ -171,71 +277,78 @@ class S3():
                 f"Prefix_target: {prefix_target} "
             )
 
-            if not prefix.endswith('/'):
-                prefix += '/'
-
             return [prefix]
 
-        # getting values that are not in the origin
-        originn, otime = _get_data_folders(origin_request)
-        targett, ttime = _get_data_folders(target_request)
+        _, ttime = _get_data_folders(target_request)
+
+        if len(otime) == 0:
+            logger.info(f"There is no data folder in {s3_origin}/{prefix}")
+            return []
 
-        origin_set = set(otime)
+        # each timestamp mapped to its origin folder
+        origin_folders = dict(zip(otime, originn))
         target_set = set(ttime)
 
         logger.info(
-            f"Origin: {s3_origin}/{prefix} {list(origin_set)} "
+            f"Origin: {s3_origin}/{prefix} {len(origin_folders)} folders "
             f"Target: {s3_target}/{prefix_target} "\
-            f"{list(target_set)}"
+            f"{len(target_set)} folders"
         )
 
         if all_files:
             # take all directorys that do not have a copy on target
-            not_in_target = list(origin_set.difference(target_set))
-        elif max(otime) <= max(target_set):
-            # there is no data to process
-            logger.info(
-                "There is no data left to process"
-                ", everything update!"
-            )
-            return []
+            not_in_target = origin_folders.keys() - target_set
         else:
+            newest_target = max(target_set) if target_set else datetime.min
+            if max(otime) <= newest_target:
+                # there is no data to process
+                logger.info(
+                    "There is no data left to process"
+                    ", everything update!"
+                )
+                return []
             # get all the files olders
-            not_in_target = []
-            for i in origin_set:
-                if i > max(target_set):
-                    not_in_target.append(i)
-
-        # get data today
-        today = datetime.now()
-
-        must_process = []
-        # Check if the data is in the timestamp
-        for i in not_in_target:
-            # find the index of the value in the list
-            index = otime.index(i)
-            try:
-                # get the senconds of the difference of the current day and
-                # the folders day
-                diff = (today - i).total_seconds()
-                # get the minimus desirable time in second to process the
-                # folder
-                period = timestamp[-1]
-                number = timestamp[:-1]
-                timestamp_seconds = timestamp_dict[period] * float(number)
-                if diff>= timestamp_seconds:
-                    must_process.append(originn[index])
-            except Exception as e:
-                war = "There is a file not in the "\
-                      "datalake supported pattern."\
-                      "\t File:"+i+"\t Or another issue:"+str(e)
-                logger.warning(war)
+            not_in_target = [i for i in otime if i > newest_target]
+
+        # only the folders older than the period are processed
+        period = timestamp[-1]
+        number = timestamp[:-1]
+        cutoff = datetime.now() - timedelta(
+            seconds=timestamp_dict[period] * float(number)
+        )
+
+        must_process = [
+            origin_folders[i] for i in sorted(not_in_target) if i <= cutoff
+        ]
 
         logger.info(f"Process: {s3_origin}/{prefix} "\
             f"\n{list(must_process)}\n")
 
         return must_process
 
+    @staticmethod
+    def mark_processed(
+        s3_target: str, dataset: str, table: str, folders: list
+    ):
+        """ Record processed folders in the partition manifest of the table,
+        read by get_buckets_to_process(use_manifest=True). The manifest is
+        rewritten, so concurrent writers of the same table must be avoided.
+
+        Args:
+            s3_target (str): bucket that have the processed data
+            dataset (str): dataset name
+            table (str): target table name
+            folders (list(str)): processed folders, as returned by
+                get_buckets_to_process
+        """
+
+        manifest_key = _manifest_key(dataset, table)
+
+        processed = set(_read_manifest(s3_target, manifest_key) or [])
+        processed.update(i.rstrip("/").rsplit("/", 1)[-1] for i in folders)
+
+        _write_manifest(s3_target, manifest_key, processed)
+
     @staticmethod
     def get_times_to_process(
         start_date: str,
@@ -309,6 +422,155 @@ class S3():
         else:
             return []
 
+def _folder_stats(sizes: list):
+    """ Count, bytes and size histogram of the files of a folder.
+
+    Args:
+        sizes (list(int)): size of each file.
+    """
+
+    labels = [f"<={i}" for i in SIZE_BINS] + [f">{SIZE_BINS[-1]}"]
+    counts = [0] * len(labels)
+    for i in sizes:
+        counts[bisect_right(SIZE_BINS, i - 1)] += 1
+
+    return {
+        "total": len(sizes),
+        "size": sum(sizes),
+        "histogram": dict(zip(labels, counts))
+    }
+
+def _scan_folder(bucket: str, folder: str):
+    """ List every file of a folder, following all the pages.
+
+    Args:
+        bucket (str): bucket name.
+        folder (str): folder prefix.
+    """
+
+    sizes = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=folder):
+        for i in page.get("Contents", []):
+            # sometimes the response comes with data of the folder
+            if i["Key"].endswith("/") and i["Size"] == 0:
+                continue
+            sizes.append(int(i["Size"]))
+
+    return _folder_stats(sizes)
+
+def _read_inventory(manifest_path: str, folders: list):
+    """ Statistics of the folders from an S3 Inventory report.
+
+    Args:
+        manifest_path (str): s3:// path of the manifest.json of the report.
+        folders (list(str)): folder prefixes.
+    """
+
+    manifest_bucket, manifest_key = manifest_path.replace("s3://", "").split("/", 1)
+    manifest = json.loads(
+        s3_client.get_object(Bucket=manifest_bucket, Key=manifest_key)["Body"].read()
+    )
+
+    file_format = manifest["fileFormat"].upper()
+    if file_format == "PARQUET" and pq is None:
+        raise ImportError("Reading a Parquet inventory requires the pyarrow package.")
+    if file_format not in ("CSV", "PARQUET"):
+        raise ValueError(f"Inventory format not supported: {file_format}")
+
+    # the report files are in the destination bucket of the inventory
+    report_bucket = manifest["destinationBucket"].split(":::")[-1]
+
+    ordered = sorted(folders)
+    sizes = {i: [] for i in folders}
+
+    def add(key: str, size):
+        # skipping the folder markers
+        if size is None or (key.endswith("/") and int(size) == 0):
+            return
+        # the folder is the greatest prefix lower or equal to the key
+        index = bisect_right(ordered, key) - 1
+        if index >= 0 and key.startswith(ordered[index]):
+            sizes[ordered[index]].append(int(size))
+
+    for report in manifest["files"]:
+        body = s3_client.get_object(Bucket=report_bucket, Key=report["key"])["Body"].read()
+
+        if file_format == "CSV":
+            schema = [i.strip() for i in manifest["fileSchema"].split(",")]
+            key_index, size_index = schema.index("Key"), schema.index("Size")
+            for row in csv.reader(io.StringIO(gzip.decompress(body).decode("utf-8"))):
+                # delete markers have no size
+                if row[size_index] == "":
+                    continue
+                # the keys of the csv reports are url encoded
+                add(unquote_plus(row[key_index]), row[size_index])
+        else:
+            report_table = pq.read_table(io.BytesIO(body), columns=["key", "size"])
+            for key, size in zip(report_table.column("key").to_pylist(),
+                                 report_table.column("size").to_pylist()):
+                add(key, size)
+
+    return {folder: _folder_stats(sizes[folder]) for folder in folders}
+
+def _list_folders(bucket: str, prefix: str):
+    """ List the folders right below a prefix, without listing their files.
+
+    Args:
+        bucket (str): bucket name.
+        prefix (str): prefix ending with '/'.
+    """
+
+    folders = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(
+        Bucket=bucket, Prefix=prefix, Delimiter="/"
+    ):
+        folders.extend(i["Prefix"] for i in page.get("CommonPrefixes", []))
+
+    return folders
+
+def _manifest_key(dataset: str, table: str):
+    """ Key of the partition manifest of a table, outside the table prefix
+    so it is never taken as a data folder.
+    """
+
+    return f"_manifests/{dataset}/{table}.json"
+
+def _read_manifest(bucket: str, key: str):
+    """ Read the processed folder names of a partition manifest.
+
+    Returns:
+        list(str) sorted, or None when there is no manifest.
+    """
+
+    try:
+        body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+    return json.loads(body)["folders"]
+
+def _write_manifest(bucket: str, key: str, folders):
+    """ Write the processed folder names of a partition manifest.
+    """
+
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps({"folders": sorted(folders)}).encode("utf-8")
+    )
+
+def _parse_folder_timestamp(name: str):
+    """ Parse the timestamp of a datalake folder, with a fast path for the
+    ISO format used by the datalake and the generic parser as fallback.
+    """
+
+    try:
+        return datetime.fromisoformat(name)
+    except ValueError:
+        return parser.parse(name)
+
 def _get_data_folders(folders: list):
     """ Get the data timestamp of the folders on s3.
 
@@ -318,13 +580,18 @@ def _get_data_folders(folders: list):
 
     folders_timestamp = []
     sub_folders = []
-    # get the subforders with data
+    # get the subforders with data, each folder is parsed once
+    seen = set()
     for i in folders:
-        data_folder = i.split("/")[2]
-        folder = "/".join(i.split("/")[:3])+"/"
+        parts = i.split("/")
+        folder = "/".join(parts[:3])+"/"
+        if folder in seen:
+            continue
+        seen.add(folder)
+        data_folder = parts[2]
         # validate if is a data format or other file
         try:
-            convert_data = parser.parse(data_folder)
+            convert_data = _parse_folder_timestamp(data_folder)
             sub_folders.append(folder)
             folders_timestamp.append(convert_data)
         except Exception as e:
@@ -0,0 +1,122 @@
+import logging
+import sqlite3
+from datetime import datetime
+import boto3
+from botocore.exceptions import ClientError
+
+class WatermarkStore:
+    """
+    Description: Keeps, per schema/table, the last `upsert_col` value
+    successfully loaded, so each extraction only pulls the rows after it.
+
+    The DynamoDB table has `table_key` ("<schema>.<table>") as partition
+    key and the attributes `watermark` and `updated_at`.
+
+    Args:
+        table(str): Name of the DynamoDB table.
+    """
+
+    def __init__(self, table: str) -> None:
+        self.table = boto3.resource('dynamodb', region_name='us-east-1').Table(table)
+        self.logger = logging.getLogger(__name__)
+
+    def get_watermark(self, schema: str, table_name: str) -> str:
+        """
+        Description: Gets the watermark of a table.
+
+        Args:
+            schema(str): Name of the schema.
+            table_name(str): Name of the table.
+
+        Returns:
+            The watermark ("%Y-%m-%d %H:%M:%S"), or None when the table
+            was never loaded.
+        """
+
+        try:
+            response = self.table.get_item(Key={"table_key": f"{schema}.{table_name}"})
+        except ClientError as error:
+            self.logger.error("Failed to retrieve the watermark: %s", error.response["Error"]["Message"])
+            raise
+
+        return response.get("Item", {}).get("watermark")
+
+    def set_watermark(self, schema: str, table_name: str, watermark: str) -> bool:
+        """
+        Description: Advances the watermark of a table. A value older than
+        the stored one is ignored, so a late retry never moves it back.
+
+        Args:
+            schema(str): Name of the schema.
+            table_name(str): Name of the table.
+            watermark(str): Last `upsert_col` value loaded.
+
+        Returns:
+            True if the watermark was advanced.
+        """
+
+        try:
+            self.table.update_item(
+                Key={"table_key": f"{schema}.{table_name}"},
+                UpdateExpression="SET watermark = :watermark, updated_at = :updated_at",
+                ConditionExpression="attribute_not_exists(watermark) OR watermark < :watermark",
+                ExpressionAttributeValues={
+                    ":watermark": watermark,
+                    ":updated_at": datetime.utcnow().isoformat()
+                }
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                self.logger.info(
+                    "Watermark of %s.%s is already at or after %s", schema, table_name, watermark
+                )
+                return False
+            self.logger.error("Failed to set the watermark: %s", error.response["Error"]["Message"])
+            raise
+
+        return True
+
+class SqliteWatermarkStore:
+    """
+    Description: Local stand-in of `WatermarkStore`, with the same
+    methods, backed by a SQLite file.
+
+    Args:
+        path(str): Path of the SQLite database. Defaults to memory.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks "
+            "(table_key TEXT PRIMARY KEY, watermark TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_watermark(self, schema: str, table_name: str) -> str:
+        """
+        Description: Gets the watermark of a table, None when it was never
+        loaded.
+        """
+
+        row = self._conn.execute(
+            "SELECT watermark FROM watermarks WHERE table_key = ?", (f"{schema}.{table_name}",)
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def set_watermark(self, schema: str, table_name: str, watermark: str) -> bool:
+        """
+        Description: Advances the watermark of a table, ignoring older
+        values.
+        """
+
+        cursor = self._conn.execute(
+            "INSERT INTO watermarks (table_key, watermark, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (table_key) DO UPDATE SET watermark = excluded.watermark, updated_at = excluded.updated_at "
+            "WHERE watermarks.watermark < excluded.watermark",
+            (f"{schema}.{table_name}", watermark, datetime.utcnow().isoformat())
+        )
+        self._conn.commit()
+
+        return cursor.rowcount > 0
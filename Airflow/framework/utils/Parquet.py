@@ -1,7 +1,15 @@
 import logging as log
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime as dt
 from io import BytesIO
+from uuid import uuid4
+from pyarrow import fs
 from airflow.providers.amazon.aws.hooks import s3
+from Airflow.framework.utils.multipart import S3MultipartWriter
+from Airflow.framework.utils.manifest_cache import prefix_manifest
 
 class Parquet:
     """
@@ -12,7 +20,177 @@ class Parquet:
     # Log configs
     log.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=log.INFO)
 
-    def check_parquet_file(self, bucket_conn: s3, bucket_name: str, dir: str, parquet_name: str) -> bool:
+    # Number of rows of each row group written to S3
+    ROW_GROUP_SIZE = 100000
+
+    def s3_filesystem(self, bucket_conn: s3) -> fs.S3FileSystem:
+        """
+        Description:
+            Creates an Arrow S3 filesystem with the credentials of the Airflow connection.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+
+        Returns:
+            Arrow S3 filesystem.
+        """
+
+        credentials = bucket_conn.get_credentials()
+
+        return fs.S3FileSystem(
+            access_key=credentials.access_key,
+            secret_key=credentials.secret_key,
+            session_token=credentials.token,
+            region=getattr(bucket_conn, "region_name", None) or "us-east-1"
+        )
+
+    def file_format(self) -> ds.ParquetFileFormat:
+        """
+        Description:
+            Parquet format used by the dataset scans, fetching the column chunks of each file
+            in a few big concurrent requests.
+
+        Returns:
+            Arrow parquet file format.
+        """
+
+        return ds.ParquetFileFormat(default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True))
+
+    @staticmethod
+    def _merge_types(current: pa.DataType, other: pa.DataType) -> pa.DataType:
+        """
+        Description:
+            Type able to hold the values of a column written with two different types.
+
+        Args:
+            current: Type found in the previous files.
+            other: Type found in another file.
+
+        Returns:
+            Arrow type.
+        """
+
+        if current == other or pa.types.is_null(other):
+
+            return current
+
+        if pa.types.is_null(current):
+
+            return other
+
+        # Same promotion done by pandas when the files were concatenated.
+        if pa.types.is_integer(current) and pa.types.is_integer(other):
+
+            return pa.int64()
+
+        if all(pa.types.is_integer(t) or pa.types.is_floating(t) or pa.types.is_decimal(t) for t in (current, other)):
+
+            return pa.float64()
+
+        if all(pa.types.is_string(t) or pa.types.is_large_string(t) for t in (current, other)):
+
+            return pa.large_string()
+
+        # Any other conflict is read as text.
+        return pa.string()
+
+    def unified_schema(self, schemas: list) -> pa.Schema:
+        """
+        Description:
+            Unifies the schemas of several files, keeping every column and promoting the conflicting types.
+
+        Args:
+            schemas: Arrow schemas of the files.
+
+        Returns:
+            Arrow schema with the columns in the order they were found.
+        """
+
+        types = {}
+
+        for schema in schemas:
+
+            for field in schema:
+
+                types[field.name] = self._merge_types(types[field.name], field.type) if field.name in types else field.type
+
+        return pa.schema([pa.field(name, arrow_type) for name, arrow_type in types.items()])
+
+    def open_dataset(self, source, filesystem: fs.FileSystem) -> ds.Dataset:
+        """
+        Description:
+            Opens a parquet dataset with the schema unified over all its files, so a column that is null in
+            some files, only exists in the newest ones or changed its type is read from every file.
+
+        Args:
+            source: Directory or list of files.
+            filesystem: Arrow filesystem of the source.
+
+        Returns:
+            Arrow dataset, without files when the directory has no parquet.
+        """
+
+        dataset = ds.dataset(source, filesystem=filesystem, format=self.file_format())
+
+        schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+
+        if not schemas:
+
+            return dataset
+
+        # Without an explicit schema the dataset takes the one of the first file. The files already listed are
+        # reused, and each one is cast to the unified schema when it is scanned.
+        return ds.dataset(
+            dataset.files, schema=self.unified_schema(schemas), filesystem=filesystem, format=self.file_format()
+        )
+
+    def read_dataset(
+        self, bucket_conn: s3, bucket_name: str, dir: str, columns: list = None, filter: ds.Expression = None
+    ) -> pd.DataFrame:
+        """
+        Description:
+            Reads every parquet under a directory with a single Arrow dataset scan.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            dir: Name of the directory in S3 bucket.
+            columns: Columns to be read. If None, all of them.
+            filter: Arrow expression used to skip row groups and rows, e.g. ds.field("id") > 10.
+
+        Returns:
+            Dataframe with the data of all the files.
+        """
+
+        try:
+
+            dataset = self.open_dataset(f"{bucket_name}/{dir}".rstrip("/"), filesystem=self.s3_filesystem(bucket_conn))
+
+        except FileNotFoundError:
+
+            # Log message.
+            log.info(f"There is no parquet in the directory '{dir}'.")
+
+            return pd.DataFrame()
+
+        if not dataset.files:
+
+            # Log message.
+            log.info(f"There is no parquet in the directory '{dir}'.")
+
+            return pd.DataFrame()
+
+        # The files are read in parallel and concatenated only once
+        table = dataset.to_table(columns=columns, filter=filter, use_threads=True)
+
+        # Log message.
+        log.info(f"{table.num_rows} rows were read from {len(dataset.files)} files.")
+
+        return table.to_pandas()
+
+    def check_parquet_file(
+        self, bucket_conn: s3, bucket_name: str, dir: str, parquet_name: str, use_cache: bool = False
+    ) -> bool:
         """
         Description:
             Return true if file exists and false if not.
@@ -22,6 +200,8 @@ class Parquet:
             bucket_name: Name of the Bucket in S3.
             dir: Name of the directory in S3 bucket.
             parquet_name: Name of parquet file to check.
+            use_cache: If True, the directory is listed once and its manifest is reused by the next checks,
+                else a single HEAD request is sent.
 
         Returns:
             A boolean value or raise an error.
@@ -29,11 +209,18 @@ class Parquet:
 
         try:
 
-            # Getting all file names in the bucket.
-            files = bucket_conn.list_keys(bucket_name=bucket_name, prefix=dir)
+            if use_cache:
+
+                exists = prefix_manifest.contains(
+                    bucket_conn=bucket_conn, bucket_name=bucket_name, prefix=dir, key=f"{dir}{parquet_name}"
+                )
+
+            else:
+
+                exists = bucket_conn.check_for_key(key=f"{dir}{parquet_name}", bucket_name=bucket_name)
 
             # Check if the files exists in the bucket.
-            if f"{dir}{parquet_name}" in files:
+            if exists:
 
                 # Log message.
                 log.info(f"File '{parquet_name}' is in the directory.")
@@ -171,15 +358,17 @@ class Parquet:
 
         try:
 
-            # Convertes dataframe into parquet.
-            self.df_to_parquet(data = data, parquet_name = parquet_name)
+            # The file is not replaced if it already exists.
+            if bucket_conn.check_for_key(key=f"{dir}{parquet_name}", bucket_name=bucket_name):
 
-            # Saves parquet file in S3 bucket.
-            bucket_conn.load_file(
-                filename=parquet_name,
-                key=f"{dir}{parquet_name}",
+                raise ValueError(f"The key {dir}{parquet_name} already exists.")
+
+            # Converts dataframe into parquet, streaming it to the S3 bucket.
+            self._upload_frame(
+                bucket_conn=bucket_conn,
                 bucket_name=bucket_name,
-                replace=False
+                key=f"{dir}{parquet_name}",
+                dataframe=pd.DataFrame(data)
             )
 
             # Log message.
@@ -231,15 +420,12 @@ class Parquet:
                 # Append.
                 dataframe = dataframe.append(dataframe_dict, ignore_index=True)
 
-                # Converts pandas dataframe to parquet file.
-                dataframe.to_parquet(parquet_name, index=False, engine="pyarrow")
-
-                # Save the file.
-                bucket_conn.load_file(
-                    filename=parquet_name,
-                    key=f"{dir}{parquet_name}",
+                # Converts pandas dataframe to parquet, streaming it to the S3 bucket.
+                self._upload_frame(
+                    bucket_conn=bucket_conn,
                     bucket_name=bucket_name,
-                    replace=True
+                    key=f"{dir}{parquet_name}",
+                    dataframe=dataframe
                 )
 
                 # Log message.
@@ -258,3 +444,243 @@ class Parquet:
 
             # Log message.
             log.critical(error)
+
+    def _part_keys(
+        self, bucket_conn: s3, bucket_name: str, dir: str, parquet_name: str, use_cache: bool = False
+    ) -> list:
+        """
+        Description:
+            Lists the part files of a parquet dataset directory.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            dir: Name of the directory in S3 bucket.
+            parquet_name: Name of the parquet dataset.
+            use_cache: Answer from the cached manifest of 'dir' instead of listing the bucket.
+
+        Returns:
+            Sorted list with the keys of the parts.
+        """
+
+        if use_cache:
+
+            keys = prefix_manifest.starting_with(
+                bucket_conn=bucket_conn, bucket_name=bucket_name, prefix=dir, key_prefix=f"{dir}{parquet_name}/"
+            )
+
+        else:
+
+            keys = bucket_conn.list_keys(bucket_name=bucket_name, prefix=f"{dir}{parquet_name}/") or []
+
+        return sorted(key for key in keys if key.endswith(".parquet"))
+
+    def _upload_batches(self, bucket_conn: s3, bucket_name: str, key: str, schema: pa.Schema, batches) -> None:
+        """
+        Description:
+            Writes record batches as parquet row groups, uploading the file in parts while it is produced.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            key: Key of the object.
+            schema: Arrow schema of the batches.
+            batches: Iterable of Arrow record batches.
+        """
+
+        with S3MultipartWriter(s3_client=bucket_conn.get_conn(), bucket_name=bucket_name, key=key) as sink:
+
+            with pq.ParquetWriter(sink, schema) as writer:
+
+                for batch in batches:
+
+                    writer.write_table(pa.Table.from_batches([batch], schema=schema))
+
+        # Keeping the cached manifests in sync with our own writes
+        prefix_manifest.add(bucket_name=bucket_name, key=key)
+
+    def _upload_table(self, bucket_conn: s3, bucket_name: str, key: str, table: pa.Table) -> None:
+        """
+        Description:
+            Serializes an Arrow table as parquet and uploads it, without touching the local disk.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            key: Key of the object.
+            table: Data to be written.
+        """
+
+        self._upload_batches(
+            bucket_conn=bucket_conn,
+            bucket_name=bucket_name,
+            key=key,
+            schema=table.schema,
+            batches=table.to_batches(max_chunksize=self.ROW_GROUP_SIZE)
+        )
+
+    def _upload_frame(self, bucket_conn: s3, bucket_name: str, key: str, dataframe: pd.DataFrame) -> None:
+        """
+        Description:
+            Serializes a dataframe as parquet and uploads it, converting one row group at a time.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            key: Key of the object.
+            dataframe: Data to be written.
+        """
+
+        # The schema is inferred from the whole frame, so every row group gets the same types.
+        schema = pa.Schema.from_pandas(dataframe, preserve_index=False)
+
+        batches = (
+            pa.RecordBatch.from_pandas(
+                dataframe.iloc[start:start + self.ROW_GROUP_SIZE], schema=schema, preserve_index=False
+            )
+            for start in range(0, len(dataframe), self.ROW_GROUP_SIZE)
+        )
+
+        self._upload_batches(bucket_conn=bucket_conn, bucket_name=bucket_name, key=key, schema=schema, batches=batches)
+
+    def append_part(self, bucket_conn: s3, bucket_name: str, dir: str, data: dict, parquet_name: str) -> bool:
+        """
+        Description:
+            Appends records to a parquet dataset writing them as a new part file, without reading the old data.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            dir: Name of the directory in S3 bucket.
+            data: Dict to be use to append records in to Parquet dataset.
+            parquet_name: Name of the parquet dataset, the parts are written in '{dir}{parquet_name}/'.
+
+        Returns:
+            A True value, or False if the schema is incompatible with the existing parts.
+        """
+
+        try:
+
+            # Moving a file written by 'write_on_file' into the dataset, as its first part.
+            if bucket_conn.check_for_key(key=f"{dir}{parquet_name}", bucket_name=bucket_name):
+
+                bucket_conn.copy_object(
+                    source_bucket_key=f"{dir}{parquet_name}",
+                    dest_bucket_key=f"{dir}{parquet_name}/part-00000000T000000-legacy.parquet",
+                    source_bucket_name=bucket_name,
+                    dest_bucket_name=bucket_name
+                )
+
+                bucket_conn.delete_objects(bucket=bucket_name, keys=f"{dir}{parquet_name}")
+
+                prefix_manifest.add(bucket_name=bucket_name, key=f"{dir}{parquet_name}/part-00000000T000000-legacy.parquet")
+                prefix_manifest.discard(bucket_name=bucket_name, key=f"{dir}{parquet_name}")
+
+            # Convert dict into Arrow table to append.
+            table = pa.Table.from_pandas(pd.DataFrame(data), preserve_index=False)
+
+            parts = self._part_keys(bucket_conn=bucket_conn, bucket_name=bucket_name, dir=dir, parquet_name=parquet_name)
+
+            if parts:
+
+                # Reading only the footer of the last part.
+                with self.s3_filesystem(bucket_conn).open_input_file(f"{bucket_name}/{parts[-1]}") as file:
+
+                    schema = pq.read_schema(file)
+
+                # Check if the columns from both schemas are equal.
+                if sorted(schema.names) != sorted(table.schema.names):
+
+                    # Log message.
+                    log.error("The columns are incompatible. Recording failed.")
+
+                    return False
+
+                # Same columns, aligning their order and types with the existing parts.
+                try:
+
+                    table = table.select(schema.names).cast(schema.remove_metadata())
+
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as error:
+
+                    # Log message.
+                    log.error(f"The column types are incompatible. Recording failed. {error}")
+
+                    return False
+
+            key = f"{dir}{parquet_name}/part-{dt.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:8]}.parquet"
+
+            self._upload_table(bucket_conn=bucket_conn, bucket_name=bucket_name, key=key, table=table)
+
+            # Log message.
+            log.info(f"Records were appended as '{key}'.")
+
+            return True
+
+        except Exception as error:
+
+            # Log message.
+            log.critical(error)
+
+    def compact_parts(self, bucket_conn: s3, bucket_name: str, dir: str, parquet_name: str) -> bool:
+        """
+        Description:
+            Merges the part files of a parquet dataset into a single part.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            dir: Name of the directory in S3 bucket.
+            parquet_name: Name of the parquet dataset.
+
+        Returns:
+            A True value or raise an error.
+        """
+
+        try:
+
+            parts = self._part_keys(bucket_conn=bucket_conn, bucket_name=bucket_name, dir=dir, parquet_name=parquet_name)
+
+            if len(parts) < 2:
+
+                # Log message.
+                log.info(f"Dataset '{parquet_name}' has nothing to compact.")
+
+                return True
+
+            dataset = ds.dataset(
+                [f"{bucket_name}/{part}" for part in parts],
+                filesystem=self.s3_filesystem(bucket_conn),
+                format="parquet"
+            )
+
+            # Keeping the name of the newest part, so the parts order is preserved.
+            key = parts[-1][:-len(".parquet")] + "-compacted.parquet"
+
+            # Streaming the parts through, so only a few batches are held in memory.
+            self._upload_batches(
+                bucket_conn=bucket_conn,
+                bucket_name=bucket_name,
+                key=key,
+                schema=dataset.schema,
+                batches=dataset.to_batches(batch_size=self.ROW_GROUP_SIZE)
+            )
+
+            # Removing the merged parts only after the new one was saved.
+            bucket_conn.delete_objects(bucket=bucket_name, keys=parts)
+
+            for part in parts:
+
+                prefix_manifest.discard(bucket_name=bucket_name, key=part)
+
+            # Log message.
+            log.info(f"{len(parts)} parts of '{parquet_name}' were compacted into '{key}'.")
+
+            return True
+
+        except Exception as error:
+
+            # Log message.
+            log.critical(error)
+
+            raise
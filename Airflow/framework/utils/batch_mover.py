@@ -0,0 +1,152 @@
+import logging
+from airflow.providers.amazon.aws.hooks import s3
+from Airflow.framework.utils.fetch_pool import FetchPool
+
+class BatchMover:
+    """
+        Description:
+            Moves many objects inside a bucket with concurrent server-side copies and batched deletes.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    # Maximum number of keys accepted by one delete_objects request
+    MAX_DELETE_BATCH = 1000
+
+    def __init__(self, bucket_conn: s3, max_workers: int = 16):
+        """
+        Description:
+            BatchMover constructor.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            max_workers: Number of copies running at the same time.
+        """
+
+        self.bucket_conn = bucket_conn
+
+        self.copy_pool = FetchPool(max_workers=max_workers, ordered=False)
+
+    def _copy(self, bucket_name: str, source_key: str, dest_key: str) -> None:
+
+        self.bucket_conn.copy_object(
+            source_bucket_key=source_key,
+            dest_bucket_key=dest_key,
+            source_bucket_name=bucket_name,
+            dest_bucket_name=bucket_name
+        )
+
+    def _existing_keys(self, bucket_name: str, dest_keys: list) -> set:
+        """
+        Description:
+            Checks, with concurrent HEAD requests, which of the destination keys exist.
+
+        Args:
+            bucket_name: Name of the Bucket in S3.
+            dest_keys: Keys expected in the destination.
+
+        Returns:
+            Set with the keys found.
+        """
+
+        existing = set()
+
+        # Only the copied keys are checked, whatever else the destination holds.
+        for key, found, error in self.copy_pool.map(
+            lambda key: self.bucket_conn.check_for_key(key=key, bucket_name=bucket_name), dest_keys
+        ):
+
+            if error is None and found:
+
+                existing.add(key)
+
+        return existing
+
+    def _delete(self, bucket_name: str, keys: list) -> dict:
+        """
+        Description:
+            Deletes keys in batches of up to 1000.
+
+        Args:
+            bucket_name: Name of the Bucket in S3.
+            keys: Keys to be deleted.
+
+        Returns:
+            Dict with the keys that could not be deleted and the reason.
+        """
+
+        client = self.bucket_conn.get_conn()
+
+        failed = {}
+
+        for start in range(0, len(keys), self.MAX_DELETE_BATCH):
+
+            chunk = keys[start:start + self.MAX_DELETE_BATCH]
+
+            response = client.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in chunk], "Quiet": True}
+            )
+
+            for error in response.get("Errors", []):
+
+                failed[error["Key"]] = f"Delete failed: {error.get('Message', error.get('Code'))}"
+
+        return failed
+
+    def move(self, bucket_name: str, keys: list, dest_dir: str) -> dict:
+        """
+        Description:
+            Moves objects to another directory of the same bucket, keeping their file names.
+
+        Args:
+            bucket_name: Name of the Bucket in S3.
+            keys: Keys of the objects to be moved.
+            dest_dir: Destination directory, ending with '/'.
+
+        Returns:
+            Dict with the 'moved' keys and the 'failed' ones mapped to the reason.
+        """
+
+        destinations = {key: dest_dir + key.split("/")[-1] for key in keys}
+
+        failed = {}
+
+        # Copying the objects concurrently.
+        for key, _, error in self.copy_pool.map(
+            lambda key: self._copy(bucket_name=bucket_name, source_key=key, dest_key=destinations[key]), keys
+        ):
+
+            if error is not None:
+
+                failed[key] = f"Copy failed: {error}"
+
+        copied = [key for key in keys if key not in failed]
+
+        # Verifying all the copies at once.
+        existing = self._existing_keys(bucket_name=bucket_name, dest_keys=[destinations[key] for key in copied])
+
+        verified = []
+
+        for key in copied:
+
+            if destinations[key] in existing:
+
+                verified.append(key)
+
+            else:
+
+                failed[key] = "The copy is not in the destination."
+
+        # Only the verified copies are removed from the source.
+        failed.update(self._delete(bucket_name=bucket_name, keys=verified))
+
+        moved = [key for key in verified if key not in failed]
+
+        logging.info(f"{len(moved)} objects were moved to '{dest_dir}', {len(failed)} failed.")
+
+        for key, reason in failed.items():
+
+            logging.error(f"File {key} was not moved. {reason}")
+
+        return {"moved": moved, "failed": failed}
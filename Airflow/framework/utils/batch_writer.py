@@ -0,0 +1,215 @@
+import gzip
+import json
+import logging
+from datetime import datetime as dt
+from io import BytesIO
+from uuid import uuid4
+from boto3.s3.transfer import TransferConfig
+from airflow.providers.amazon.aws.hooks import s3
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class NdjsonBatchWriter:
+    """
+        Description:
+            Packs records into size or count bounded NDJSON objects, each one uploaded under a unique key.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    # File extension of each compression
+    EXTENSIONS = {None: ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+
+    def __init__(
+        self,
+        bucket_conn: s3,
+        bucket_name: str,
+        dir: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_records: int = None,
+        compression: str = None,
+        multipart_threshold: int = 16 * 1024 * 1024
+    ):
+        """
+        Description:
+            NdjsonBatchWriter constructor.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            dir: Directory where the objects will be written.
+            max_bytes: Maximum size, before compression, of each object.
+            max_records: Maximum number of records of each object. If None only the size is checked.
+            compression: None, 'gzip' or 'zstd'.
+            multipart_threshold: Objects bigger than this size are sent through multipart upload.
+        """
+
+        if compression not in self.EXTENSIONS:
+
+            raise ValueError(f"Compression '{compression}' is not supported. Use one of {list(self.EXTENSIONS)}.")
+
+        if compression == "zstd" and zstandard is None:
+
+            raise ImportError("The 'zstd' compression requires the zstandard package.")
+
+        self.bucket_conn = bucket_conn
+        self.bucket_name = bucket_name
+        self.dir = dir if dir.endswith("/") else dir + "/"
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.compression = compression
+
+        # Multipart is handled by the S3 transfer manager above the threshold
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=max(multipart_threshold // 2, 5 * 1024 * 1024)
+        )
+
+        # Unique prefix of the objects written by this instance
+        self._run_id = f"{dt.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:8]}"
+
+        # Sequence number of the next object
+        self._sequence = 0
+
+        # Lines of the current object
+        self._lines = []
+        self._size = 0
+
+        # Keys already written
+        self.keys = []
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        # Only uploading the pending records when the block ended successfully
+        if exc_type is None:
+
+            self.close()
+
+    @staticmethod
+    def _serialize(record) -> bytes:
+        """
+        Description:
+            Converts one record into NDJSON bytes.
+
+        Args:
+            record: A dict or list (serialized as JSON), a str or bytes (already serialized) or a file object.
+
+        Returns:
+            The bytes, without the trailing line break.
+        """
+
+        if hasattr(record, "read"):
+
+            record = record.read()
+
+        if isinstance(record, str):
+
+            record = record.encode("utf-8")
+
+        if not isinstance(record, bytes):
+
+            record = json.dumps(record, default=str).encode("utf-8")
+
+        return record.rstrip(b"\n")
+
+    def _compress(self, data: bytes) -> bytes:
+
+        if self.compression == "gzip":
+
+            return gzip.compress(data)
+
+        if self.compression == "zstd":
+
+            return zstandard.ZstdCompressor().compress(data)
+
+        return data
+
+    def write(self, record) -> None:
+        """
+        Description:
+            Adds one record to the current object, uploading it when a bound is reached.
+
+        Args:
+            record: Record to be written.
+        """
+
+        line = self._serialize(record)
+
+        # Starting a new object if this line would exceed the size bound
+        if self._lines and self._size + len(line) + 1 > self.max_bytes:
+
+            self.flush()
+
+        self._lines.append(line)
+        self._size += len(line) + 1
+
+        if self.max_records is not None and len(self._lines) >= self.max_records:
+
+            self.flush()
+
+    def write_many(self, records) -> None:
+        """
+        Description:
+            Adds several records.
+
+        Args:
+            records: Iterable of records.
+        """
+
+        for record in records:
+
+            self.write(record)
+
+    def flush(self) -> str:
+        """
+        Description:
+            Uploads the current object.
+
+        Returns:
+            The key of the uploaded object, or None if there was nothing to upload.
+        """
+
+        if not self._lines:
+
+            return None
+
+        key = f"{self.dir}{self._run_id}-{self._sequence:06d}{self.EXTENSIONS[self.compression]}"
+
+        body = self._compress(b"\n".join(self._lines) + b"\n")
+
+        # The transfer manager switches to multipart upload above the threshold
+        self.bucket_conn.get_conn().upload_fileobj(
+            Fileobj=BytesIO(body),
+            Bucket=self.bucket_name,
+            Key=key,
+            Config=self.transfer_config
+        )
+
+        logging.info(f"{len(self._lines)} records were written in '{key}'.")
+
+        self.keys.append(key)
+        self._sequence += 1
+        self._lines = []
+        self._size = 0
+
+        return key
+
+    def close(self) -> list:
+        """
+        Description:
+            Uploads the pending records.
+
+        Returns:
+            List with every key written.
+        """
+
+        self.flush()
+
+        return self.keys
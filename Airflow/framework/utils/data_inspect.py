@@ -1,5 +1,8 @@
+import logging
 from airflow.providers.oracle.hooks.oracle import OracleHook
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from Airflow.framework.resources.watermarks import WatermarkStore
 
 class DataInspect:
     # def __int__(self):
@@ -42,10 +45,100 @@ class DataInspect:
         return {"actual_ds_str": actual_ds_str, "prev_ds_str": prev_ds_str}
 
     @staticmethod
-    def oracle_check_table_data(ts=str, oracle_schema_metadata=list, schema=str, interval=str) -> list:
+    def window_condition(upsert_col=str, dt_strings=dict) -> str:
+        """
+
+        :param upsert_col:
+        :param dt_strings: window of compute_datetime, or of table_window when the table has a watermark
+        :return: WHERE condition of the window
+        """
+
+        # The start of a window coming from a watermark was already loaded
+        start_op = ">" if dt_strings.get("exclusive_start") else ">="
+
+        return f"{upsert_col} {start_op} TO_TIMESTAMP('{dt_strings['prev_ds_str']}', 'yyyy-mm-dd hh24:mi:ss') \
+              AND {upsert_col} <= TO_TIMESTAMP('{dt_strings['actual_ds_str']}', 'yyyy-mm-dd hh24:mi:ss')"
+
+    @staticmethod
+    def table_window(dt_strings=dict, watermark_store=None, schema=str, table_name=str) -> dict:
+        """
+        Window read by the extraction lambda: right after the watermark of the table when it has one, so the rows
+        of a missed run are still found.
+
+        :param dt_strings: window of compute_datetime
+        :param watermark_store: WatermarkStore, or None to use the execution window
+        :param schema:
+        :param table_name:
+        :return: the window of the table
+        """
+
+        if watermark_store is None:
+            return dt_strings
+
+        watermark = watermark_store.get_watermark(schema=schema, table_name=table_name)
+
+        if watermark is None:
+            return dt_strings
+
+        return {**dt_strings, "prev_ds_str": watermark, "exclusive_start": True}
+
+    @staticmethod
+    def probe_tables(tables=list) -> list:
+        """
+        Checks, in a single round trip, which tables have at least one row in their window.
+
+        :param tables: list of (table_name, upsert_col, window)
+        :return: names of the tables with data
+        """
+
+        # Each EXISTS stops at the first row found
+        query = " UNION ALL ".join(
+            f"SELECT '{table_name}' FROM dual WHERE EXISTS (SELECT 1 FROM {table_name} \
+             WHERE {DataInspect.window_condition(upsert_col=upsert_col, dt_strings=window)})"
+            for table_name, upsert_col, window in tables
+        )
+
+        conn = OracleHook(conn_name_attr="oracle_default").get_conn()
+
+        try:
+
+            cursor = conn.cursor()
+
+            cursor.execute(query)
+
+            found = [row[0] for row in cursor.fetchall()]
+
+            cursor.close()
+
+        finally:
+
+            conn.close()
+
+        return found
+
+    @staticmethod
+    def oracle_check_table_data(
+        ts=str,
+        oracle_schema_metadata=list,
+        schema=str,
+        interval=str,
+        mode="exists",
+        probe_batch_size=50,
+        max_workers=4,
+        watermark_table=None,
+        watermark_store=None
+    ) -> list:
         """
 
         :param oracle_tns_metadata:
+        :param mode: "exists" probes the tables in batches, stopping at the first row of each one. "count" runs the
+                     exact count of each table, one after another
+        :param probe_batch_size: tables checked per query in the "exists" mode
+        :param max_workers: batches checked at the same time, each one on its own connection
+        :param watermark_table: DynamoDB table with the watermarks. When given, each table is probed after its
+                                watermark instead of the execution window
+        :param watermark_store: store with the same methods of WatermarkStore, e.g. SqliteWatermarkStore, used
+                                instead of the DynamoDB table
 
         :return:
         """
@@ -56,24 +149,51 @@ class DataInspect:
         # Getting the datetimes
         dt_strings = DataInspect.compute_datetime(airflow_ts=ts, interval=interval)
 
-        # Opening the Oracle DB connection
-        conn = OracleHook(conn_name_attr="oracle_default").get_conn()
+        if watermark_store is None and watermark_table:
+            watermark_store = WatermarkStore(table=watermark_table)
+
+        # Table name, datetime column and window of each table
+        tables = []
 
         for table in oracle_schema_metadata:
 
-            # The table name
             table_name = list(table.keys())[0]
 
+            window = DataInspect.table_window(
+                dt_strings=dt_strings, watermark_store=watermark_store, schema=schema, table_name=table_name
+            )
+
+            # Already loaded up to the end of the window
+            if window["prev_ds_str"] >= window["actual_ds_str"]:
+                logging.info(f"{schema}.{table_name} is already loaded up to {window['prev_ds_str']}")
+                continue
+
+            tables.append((table_name, table[table_name]["upsert_col"], window))
+
+        if mode == "exists":
+
+            batches = [tables[i:i + probe_batch_size] for i in range(0, len(tables), probe_batch_size)]
+
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+
+                found = set().union(*executor.map(DataInspect.probe_tables, batches))
+
+            logging.info(f"Tables with data: {sorted(found)}")
+
+            # Keeping the order of the metadata
+            return [f"{schema}.{table_name}_extrac" for table_name, _, _ in tables if table_name in found]
+
+        # Opening the Oracle DB connection
+        conn = OracleHook(conn_name_attr="oracle_default").get_conn()
+
+        for table_name, upsert_col, window in tables:
+
             # Setting the task_id
             tk_id = f"{schema}.{table_name}_extrac"
 
-            # Getting the table datetime column
-            upsert_col = table[table_name]["upsert_col"]
-
             # Query to be executed into DB
             query = f"SELECT count(*) AS count FROM {table_name} \
-             WHERE {upsert_col} >= TO_TIMESTAMP('{dt_strings['prev_ds_str']}', 'yyyy-mm-dd hh24:mi:ss') \
-              AND {upsert_col} <= TO_TIMESTAMP('{dt_strings['actual_ds_str']}', 'yyyy-mm-dd hh24:mi:ss')"
+             WHERE {DataInspect.window_condition(upsert_col=upsert_col, dt_strings=window)}"
 
             # Setting the DB cursor
             cursor = conn.cursor()
@@ -83,7 +203,7 @@ class DataInspect:
 
             # Getting the number of records
             records = cursor.fetchone()
-            print(f"records: {records}")
+            logging.debug(f"{table_name} records: {records}")
 
             if records[0] > 0:
                 tables_with_data.append(tk_id)
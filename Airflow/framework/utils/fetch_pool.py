@@ -0,0 +1,114 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator
+
+class FetchPool:
+    """
+        Description:
+            Thread pool to run blocking S3 requests with a bounded number of requests in flight.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    def __init__(self, max_workers: int = 16, max_in_flight: int = None, ordered: bool = True):
+        """
+        Description:
+            FetchPool constructor.
+
+        Args:
+            max_workers: Number of threads issuing the requests.
+            max_in_flight: Maximum number of submitted requests whose results were not delivered yet.
+                Defaults to twice the number of workers.
+            ordered: If True the results are delivered in the input order, else as soon as they complete.
+        """
+
+        if max_workers < 1:
+
+            raise ValueError("The number of workers must be at least 1.")
+
+        # Number of threads
+        self.max_workers = max_workers
+
+        # Bounding the results kept in memory
+        self.max_in_flight = max(max_in_flight or 2 * max_workers, max_workers)
+
+        # Delivery order
+        self.ordered = ordered
+
+    def map(self, func: Callable, items: Iterable) -> Iterator:
+        """
+        Description:
+            Applies 'func' to every item concurrently.
+
+        Args:
+            func: Blocking function that receives one item, e.g. a GET of one S3 key.
+            items: Items to be fetched, e.g. a list of keys.
+
+        Returns:
+            A generator of tuples (item, result, error). When 'func' raises, result is None and error
+            holds the exception, so one failed request does not stop the others.
+        """
+
+        items = iter(items)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            # Futures mapped to the item that originated them, in submission order
+            pending = deque()
+            origin = {}
+
+            def submit_next() -> bool:
+
+                try:
+
+                    item = next(items)
+
+                except StopIteration:
+
+                    return False
+
+                future = executor.submit(func, item)
+                origin[future] = item
+                pending.append(future)
+
+                return True
+
+            # Filling the pool
+            while len(pending) < self.max_in_flight and submit_next():
+
+                pass
+
+            while pending:
+
+                if self.ordered:
+
+                    # Waiting for the oldest request
+                    done = [pending.popleft()]
+
+                else:
+
+                    # Waiting for any request
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    done = [future for future in pending if future in finished]
+
+                    for future in done:
+
+                        pending.remove(future)
+
+                for future in done:
+
+                    item = origin.pop(future)
+
+                    try:
+
+                        yield item, future.result(), None
+
+                    except Exception as error:
+
+                        logging.error(f"Request for '{item}' failed: {error}")
+
+                        yield item, None, error
+
+                    # Replacing the delivered request
+                    submit_next()
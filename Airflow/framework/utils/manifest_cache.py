@@ -0,0 +1,144 @@
+import logging
+import time
+from threading import Lock
+from airflow.providers.amazon.aws.hooks import s3
+
+class PrefixManifest:
+    """
+        Description:
+            In-process cache with the keys under S3 prefixes, so repeated existence checks do not list the bucket.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    def __init__(self, ttl: float = 300):
+        """
+        Description:
+            PrefixManifest constructor.
+
+        Args:
+            ttl: Seconds a listed prefix is trusted before being listed again.
+        """
+
+        self.ttl = ttl
+
+        # (bucket name, prefix) mapped to (expiration time, set of keys)
+        self._entries = {}
+
+        self._lock = Lock()
+
+    def _keys(self, bucket_conn: s3, bucket_name: str, prefix: str) -> set:
+        """
+        Description:
+            Returns the keys of a prefix, listing it only when it is not cached or it expired.
+        """
+
+        with self._lock:
+
+            entry = self._entries.get((bucket_name, prefix))
+
+            if entry is not None and entry[0] > time.monotonic():
+
+                return entry[1]
+
+        keys = set(bucket_conn.list_keys(bucket_name=bucket_name, prefix=prefix) or [])
+
+        with self._lock:
+
+            self._entries[(bucket_name, prefix)] = (time.monotonic() + self.ttl, keys)
+
+        logging.info(f"Manifest of 's3://{bucket_name}/{prefix}' was cached with {len(keys)} keys.")
+
+        return keys
+
+    def contains(self, bucket_conn: s3, bucket_name: str, prefix: str, key: str) -> bool:
+        """
+        Description:
+            Checks if a key exists, using the cached manifest of its prefix.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            prefix: Prefix whose manifest is cached.
+            key: Key to be checked.
+
+        Returns:
+            A boolean value.
+        """
+
+        return key in self._keys(bucket_conn=bucket_conn, bucket_name=bucket_name, prefix=prefix)
+
+    def starting_with(self, bucket_conn: s3, bucket_name: str, prefix: str, key_prefix: str) -> list:
+        """
+        Description:
+            Returns the keys that start with a value, using the cached manifest of their prefix.
+
+        Args:
+            bucket_conn: object type s3. The connection with S3 open previously by another class.
+            bucket_name: Name of the Bucket in S3.
+            prefix: Prefix whose manifest is cached.
+            key_prefix: Start of the keys to be returned.
+
+        Returns:
+            List with the matching keys.
+        """
+
+        return [
+            key for key in self._keys(bucket_conn=bucket_conn, bucket_name=bucket_name, prefix=prefix)
+            if key.startswith(key_prefix)
+        ]
+
+    def add(self, bucket_name: str, key: str) -> None:
+        """
+        Description:
+            Registers a key written by us in every cached manifest that covers it.
+        """
+
+        with self._lock:
+
+            for (cached_bucket, prefix), (_, keys) in self._entries.items():
+
+                if cached_bucket == bucket_name and key.startswith(prefix):
+
+                    keys.add(key)
+
+    def discard(self, bucket_name: str, key: str) -> None:
+        """
+        Description:
+            Removes a key deleted by us from every cached manifest.
+        """
+
+        with self._lock:
+
+            for (cached_bucket, _), (_, keys) in self._entries.items():
+
+                if cached_bucket == bucket_name:
+
+                    keys.discard(key)
+
+    def invalidate(self, bucket_name: str = None, prefix: str = None) -> None:
+        """
+        Description:
+            Drops cached manifests, all of them when no argument is given.
+
+        Args:
+            bucket_name: Only drops the manifests of this bucket.
+            prefix: Only drops the manifests whose prefix starts with this value.
+        """
+
+        with self._lock:
+
+            for cached_bucket, cached_prefix in list(self._entries):
+
+                if bucket_name is not None and cached_bucket != bucket_name:
+
+                    continue
+
+                if prefix is not None and not cached_prefix.startswith(prefix):
+
+                    continue
+
+                del self._entries[(cached_bucket, cached_prefix)]
+
+# Manifest shared by every reader and writer of the process
+prefix_manifest = PrefixManifest()
@@ -0,0 +1,173 @@
+import logging
+from io import BytesIO
+
+class S3MultipartWriter:
+    """
+        Description:
+            Writable file object that uploads its content to S3 in parts while it is being written.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    # S3 does not accept parts smaller than 5 MiB, except the last one
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, s3_client, bucket_name: str, key: str, part_size: int = 16 * 1024 * 1024):
+        """
+        Description:
+            S3MultipartWriter constructor.
+
+        Args:
+            s3_client: boto3 S3 client.
+            bucket_name: Name of the Bucket in S3.
+            key: Key of the object to be written.
+            part_size: Size of each uploaded part. Peak memory is about this size.
+        """
+
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+
+        # Data not uploaded yet
+        self._buffer = BytesIO()
+
+        # The multipart upload is only created when the first part is full
+        self._upload_id = None
+        self._parts = []
+
+        # Total of bytes written
+        self._position = 0
+
+        self.closed = False
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        if exc_type is None:
+
+            self.close()
+
+        else:
+
+            self.abort()
+
+    def writable(self) -> bool:
+
+        return True
+
+    def seekable(self) -> bool:
+
+        return False
+
+    def tell(self) -> int:
+
+        return self._position
+
+    def flush(self) -> None:
+
+        pass
+
+    def write(self, data) -> int:
+        """
+        Description:
+            Buffers the data, uploading a part each time the buffer reaches the part size.
+
+        Args:
+            data: Bytes-like object.
+
+        Returns:
+            Number of bytes written.
+        """
+
+        if self.closed:
+
+            raise ValueError("I/O operation on closed file.")
+
+        written = self._buffer.write(data)
+        self._position += written
+
+        if self._buffer.tell() >= self.part_size:
+
+            self._upload_part()
+
+        return written
+
+    def _upload_part(self) -> None:
+
+        if self._upload_id is None:
+
+            self._upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=self.key)["UploadId"]
+
+        part_number = len(self._parts) + 1
+
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=self._buffer.getvalue()
+        )
+
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+        # Releasing the memory of the uploaded part
+        self._buffer = BytesIO()
+
+    def close(self) -> None:
+        """
+        Description:
+            Uploads the remaining data and completes the object.
+        """
+
+        if self.closed:
+
+            return
+
+        try:
+
+            if self._upload_id is None:
+
+                # Small objects are sent in a single request
+                self.s3_client.put_object(Bucket=self.bucket_name, Key=self.key, Body=self._buffer.getvalue())
+
+            else:
+
+                if self._buffer.tell() > 0:
+
+                    self._upload_part()
+
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts}
+                )
+
+        except Exception:
+
+            self.abort()
+
+            raise
+
+        self.closed = True
+
+        logging.info(f"{self._position} bytes were written in '{self.key}'.")
+
+    def abort(self) -> None:
+        """
+        Description:
+            Discards the data, so no partial object is left in the bucket.
+        """
+
+        if self._upload_id is not None:
+
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self._upload_id)
+
+            self._upload_id = None
+
+        self._buffer = BytesIO()
+        self.closed = True
@@ -0,0 +1,236 @@
+import gzip
+import json
+import logging
+from io import BytesIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import json as pa_json
+except ImportError:
+    pa = None
+    pa_json = None
+
+class NdjsonDecoder:
+    """
+        Description:
+            Decodes whole NDJSON bodies, with a pluggable parsing backend.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    # Supported backends, None picks the fastest one installed
+    BACKENDS = (None, "json", "orjson", "pyarrow")
+
+    def __init__(self, backend: str = None):
+        """
+        Description:
+            NdjsonDecoder constructor.
+
+        Args:
+            backend: Parser to be used: 'json' (standard library), 'orjson' or 'pyarrow'. By default orjson
+                decodes the dicts and pyarrow the tables, when they are installed.
+        """
+
+        if backend not in self.BACKENDS:
+
+            raise ValueError(f"Backend '{backend}' is not supported. Use one of {self.BACKENDS}.")
+
+        if backend == "orjson" and orjson is None:
+
+            raise ImportError("The 'orjson' backend requires the orjson package.")
+
+        if backend == "pyarrow" and pa is None:
+
+            raise ImportError("The 'pyarrow' backend requires the pyarrow package.")
+
+        # Name of the backend
+        self.backend = backend
+
+        # Function that parses JSON into dicts. The dicts never go through the Arrow type inference.
+        self._loads = orjson.loads if backend != "json" and orjson is not None else json.loads
+
+        # Tables are read by pyarrow in one call, unless a dict backend was chosen
+        self._arrow_tables = backend in (None, "pyarrow") and pa is not None
+
+        # Side output with the lines that could not be parsed
+        self.malformed = []
+
+    @staticmethod
+    def _decompress(body: bytes) -> bytes:
+        """
+        Description:
+            Decompresses gzip or zstd bodies, detected by their magic number.
+
+        Args:
+            body: Raw content of the object.
+
+        Returns:
+            The NDJSON content.
+        """
+
+        if body[:2] == b"\x1f\x8b":
+
+            return gzip.decompress(body)
+
+        if body[:4] == b"\x28\xb5\x2f\xfd":
+
+            if zstandard is None:
+
+                raise ImportError("Reading zstd objects requires the zstandard package.")
+
+            return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+        return body
+
+    def _split_valid_lines(self, body: bytes, source: str) -> list:
+        """
+        Description:
+            Parses line by line, moving the malformed ones to the side output.
+
+        Args:
+            body: NDJSON content.
+            source: Name of the object the body came from, used in the side output.
+
+        Returns:
+            List with the parsed records.
+        """
+
+        records = []
+
+        for number, line in enumerate(body.splitlines(), start=1):
+
+            if not line.strip():
+
+                continue
+
+            try:
+
+                records.append(self._loads(line))
+
+            except Exception as error:
+
+                self.malformed.append({"source": source, "line": number, "data": line, "error": str(error)})
+
+        return records
+
+    def decode(self, body: bytes, source: str = None) -> list:
+        """
+        Description:
+            Parses a whole NDJSON body, in one backend call when every line is valid.
+
+        Args:
+            body: NDJSON content.
+            source: Name of the object the body came from, used in the side output.
+
+        Returns:
+            List of dicts, one per valid line. Malformed lines are appended to 'malformed'.
+        """
+
+        body = self._decompress(body)
+
+        lines = [line for line in body.splitlines() if line.strip()]
+
+        if not lines:
+
+            return []
+
+        try:
+
+            # Each line is wrapped in its own array. The separator holds a line break, which no JSON string can
+            # contain, so a document can only cross it by unbalancing the arrays, and a line holding more than one
+            # document gives an array with more than one item.
+            wrapped = self._loads(b"[[" + b"],\n[".join(lines) + b"]]")
+
+            if len(wrapped) == len(lines) and all(isinstance(item, list) and len(item) == 1 for item in wrapped):
+
+                return [item[0] for item in wrapped]
+
+        except Exception:
+
+            pass
+
+        # Some line is malformed, falling back to one call per line.
+        malformed_before = len(self.malformed)
+
+        records = self._split_valid_lines(body=body, source=source)
+
+        logging.warning(f"{len(self.malformed) - malformed_before} malformed line(s) found in '{source}'.")
+
+        return records
+
+    def decode_table(self, body: bytes, source: str = None):
+        """
+        Description:
+            Parses a whole NDJSON body into a columnar table.
+
+        Args:
+            body: NDJSON content.
+            source: Name of the object the body came from, used in the side output.
+
+        Returns:
+            A pyarrow Table. Malformed lines are appended to 'malformed'.
+        """
+
+        if pa is None:
+
+            raise ImportError("Decoding into a table requires the pyarrow package.")
+
+        body = self._decompress(body)
+
+        if not self._arrow_tables:
+
+            return pa.Table.from_pylist(self.decode(body=body, source=source))
+
+        lines = [line for line in body.splitlines() if line.strip()]
+
+        try:
+
+            table = pa_json.read_json(BytesIO(body))
+
+            # A line holding more than one document is read as several rows, as malformed as for the dict backends.
+            if table.num_rows == len(lines):
+
+                return table
+
+        except pa.ArrowInvalid:
+
+            pass
+
+        # Some line is malformed, keeping only the valid ones and parsing them again.
+        malformed_before = len(self.malformed)
+
+        records = self._split_valid_lines(body=body, source=source)
+
+        logging.warning(f"{len(self.malformed) - malformed_before} malformed line(s) found in '{source}'.")
+
+        if not records:
+
+            return pa.table({})
+
+        valid_body = b"\n".join(json.dumps(record).encode() for record in records)
+
+        try:
+
+            return pa_json.read_json(BytesIO(valid_body))
+
+        except pa.ArrowInvalid as error:
+
+            # The lines are valid JSON but their types can not share one table, e.g. {"a": 1} and {"a": "x"}.
+            self.malformed.extend(
+                {"source": source, "line": None, "data": json.dumps(record).encode(), "error": str(error)}
+                for record in records
+            )
+
+            logging.warning(f"{len(records)} record(s) of '{source}' with conflicting types were set aside.")
+
+            return pa.table({})
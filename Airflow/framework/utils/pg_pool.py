@@ -0,0 +1,288 @@
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Lock
+import psycopg2
+from psycopg2.extensions import STATUS_READY
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+
+class PostgresPool:
+    """
+        Description:
+            Per-process pool of Postgres connections, reused by the tasks running on the same worker.
+    """
+
+    logging.basicConfig(format="%(process)d-%(levelname)s-%(message)s", level=logging.INFO)
+
+    # Pools of the process, one per Airflow connection id
+    _pools = {}
+    _pools_lock = Lock()
+
+    def __init__(
+        self,
+        conn_params: dict,
+        min_size: int = 1,
+        max_size: int = 8,
+        statement_timeout: int = None,
+        idle_timeout: float = 300,
+        checkout_timeout: float = 30
+    ):
+        """
+        Description:
+            PostgresPool constructor.
+
+        Args:
+            conn_params: Keyword arguments of psycopg2.connect.
+            min_size: Number of idle connections that are never reaped.
+            max_size: Maximum number of open connections.
+            statement_timeout: Statement timeout, in milliseconds, of every connection. None means no timeout.
+            idle_timeout: Seconds an idle connection is kept open above 'min_size'.
+            checkout_timeout: Seconds to wait for a free connection when the pool is full.
+        """
+
+        if not 0 <= min_size <= max_size or max_size < 1:
+
+            raise ValueError("The pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+
+        self.conn_params = dict(conn_params)
+
+        if statement_timeout is not None:
+
+            self.conn_params["options"] = f"{self.conn_params.get('options', '')} -c statement_timeout={statement_timeout}".strip()
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+
+        # Idle connections with the time they were returned, the most recent on the right
+        self._idle = deque()
+
+        # Number of open connections, idle or checked out
+        self._opened = 0
+
+        self._condition = Condition()
+
+    @classmethod
+    def for_hook(cls, hook: PostgresHook, **kwargs) -> "PostgresPool":
+        """
+        Description:
+            Returns the pool of the process for an Airflow Postgres connection, creating it on the first call.
+
+        Args:
+            hook: Airflow Postgres hook.
+            kwargs: Arguments of the constructor, only used when the pool is created.
+
+        Returns:
+            The pool.
+        """
+
+        conn_id = getattr(hook, hook.conn_name_attr)
+
+        # A forked worker must not share the parent connections
+        key = (os.getpid(), conn_id)
+
+        with cls._pools_lock:
+
+            if key not in cls._pools:
+
+                conn = hook.get_connection(conn_id)
+
+                conn_params = {
+                    "host": conn.host,
+                    "port": conn.port or 5432,
+                    "user": conn.login,
+                    "password": conn.password,
+                    "dbname": hook.schema or conn.schema
+                }
+
+                if "sslmode" in conn.extra_dejson:
+
+                    conn_params["sslmode"] = conn.extra_dejson["sslmode"]
+
+                cls._pools[key] = cls(conn_params=conn_params, **kwargs)
+
+                logging.info(f"Connection pool created for '{conn_id}'.")
+
+            return cls._pools[key]
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+
+        if conn.closed:
+
+            return False
+
+        try:
+
+            with conn.cursor() as cursor:
+
+                cursor.execute("SELECT 1")
+
+            conn.rollback()
+
+            return True
+
+        except psycopg2.Error:
+
+            return False
+
+    def _close(self, conn) -> None:
+
+        try:
+
+            conn.close()
+
+        except psycopg2.Error:
+
+            pass
+
+        with self._condition:
+
+            self._opened -= 1
+
+            self._condition.notify()
+
+    def reap_idle(self) -> None:
+        """
+        Description:
+            Closes the connections idle for more than 'idle_timeout', keeping at least 'min_size' of them.
+        """
+
+        expired = []
+
+        with self._condition:
+
+            limit = time.monotonic() - self.idle_timeout
+
+            # The oldest connections are on the left
+            while len(self._idle) > self.min_size and self._idle[0][1] < limit:
+
+                expired.append(self._idle.popleft()[0])
+
+        for conn in expired:
+
+            self._close(conn)
+
+        if expired:
+
+            logging.info(f"{len(expired)} idle connections were closed.")
+
+    def _checkout(self):
+
+        self.reap_idle()
+
+        deadline = time.monotonic() + self.checkout_timeout
+
+        while True:
+
+            with self._condition:
+
+                conn = self._idle.pop()[0] if self._idle else None
+
+                if conn is None and self._opened < self.max_size:
+
+                    self._opened += 1
+
+                    conn = False
+
+                if conn is None:
+
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+
+                        raise TimeoutError(f"No connection was released in {self.checkout_timeout} seconds.")
+
+                    self._condition.wait(remaining)
+
+                    continue
+
+            if conn is False:
+
+                try:
+
+                    return psycopg2.connect(**self.conn_params)
+
+                except Exception:
+
+                    with self._condition:
+
+                        self._opened -= 1
+
+                        self._condition.notify()
+
+                    raise
+
+            # Replacing the connections dropped by the server
+            if self._is_healthy(conn):
+
+                return conn
+
+            self._close(conn)
+
+    def _checkin(self, conn) -> None:
+
+        if conn.closed:
+
+            self._close(conn)
+
+            return
+
+        try:
+
+            # Discarding what the user did not commit
+            if conn.status != STATUS_READY:
+
+                conn.rollback()
+
+        except psycopg2.Error:
+
+            self._close(conn)
+
+            return
+
+        with self._condition:
+
+            self._idle.append((conn, time.monotonic()))
+
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Description:
+            Checks out a connection, returning it to the pool at the end of the block.
+            Uncommitted work is rolled back when the connection is returned.
+
+        Returns:
+            A psycopg2 connection.
+        """
+
+        conn = self._checkout()
+
+        try:
+
+            yield conn
+
+        finally:
+
+            self._checkin(conn)
+
+    def close_all(self) -> None:
+        """
+        Description:
+            Closes every idle connection.
+        """
+
+        with self._condition:
+
+            idle = [conn for conn, _ in self._idle]
+
+            self._idle.clear()
+
+        for conn in idle:
+
+            self._close(conn)
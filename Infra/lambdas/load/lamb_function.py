@@ -1,6 +1,22 @@
-import awswrangler as wr
+import boto3
+import io
+import logging
 import psycopg2
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
+from decimal import Decimal
+from pyarrow import fs
+
+# Create and configure logger
+logging.basicConfig(
+    format="%(name)s -> %(levelname)s: %(message)s",
+    filemode="a",
+    level=logging.INFO
+)
+
+# Creating an object
+logger = logging.getLogger()
 
 def compute_datetime(airflow_ts=str, interval=str) -> dict:
     """
@@ -83,6 +99,167 @@ def generate_query(constraint_conflict: str, table: str, columns: list) -> str:
 
     return final_query
 
+def constraint_columns(cursor, table: str, constraint_conflict: str) -> list:
+    """
+    Resolves the columns of the constraint named by an 'ON CONSTRAINT name' conflict target.
+
+    :param cursor:
+    :param table:
+    :param constraint_conflict:
+    :return: the constraint columns, in the constraint order
+    """
+
+    constraint = constraint_conflict.strip()[len("ON CONSTRAINT"):].strip()
+
+    cursor.execute(
+        "SELECT a.attname FROM pg_constraint c "
+        "CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, position) "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum "
+        "WHERE c.conname = %s AND c.conrelid = %s::regclass ORDER BY k.position",
+        (constraint, table)
+    )
+
+    columns = [row[0] for row in cursor.fetchall()]
+
+    if not columns:
+        raise ValueError(f"Constraint '{constraint}' was not found on table '{table}'")
+
+    return columns
+
+def generate_staging_upsert(
+    constraint_conflict: str, table: str, stage: str, columns: list, key_columns: list = None
+) -> str:
+    """
+
+    :param constraint_conflict:
+    :param table:
+    :param stage:
+    :param columns:
+    :param key_columns: columns of the constraint, required with 'ON CONSTRAINT name'
+    :return:
+    """
+
+    # Moving every staged row into the target table with a single set-based statement.
+    insert = "INSERT INTO " + table + " (" + ", ".join(columns) + ") SELECT "
+
+    conflict = constraint_conflict.strip()
+
+    if conflict.upper().startswith("ON CONSTRAINT"):
+
+        if not key_columns:
+            raise ValueError(f"The columns of '{conflict}' are needed to deduplicate the staged rows")
+
+        keys = ", ".join(key_columns)
+
+    else:
+
+        keys = conflict.strip("()")
+        conflict = "(" + keys + ")"
+
+    # A key can not be updated twice by the same statement, so only its last staged row is kept.
+    select = "DISTINCT ON (" + keys + ") " + ", ".join(columns) + " FROM " + stage + " ORDER BY " + keys + ", ctid DESC"
+
+    # Updating the rows that already exist.
+    excluded = [c + "=EXCLUDED." + c for c in columns]
+
+    return insert + select + " ON CONFLICT " + conflict + " DO UPDATE SET " + ",".join(excluded) + ";"
+
+def copy_field(value) -> str:
+    """
+    Formats one value as a field of the COPY csv. Only the NULL marker is left unquoted among the texts, so a
+    string "\\N" is not loaded as NULL.
+
+    :param value:
+    :return: the csv field
+    """
+
+    # None and NaN are written as the NULL marker
+    if value is None or value != value:
+        return "\\N"
+
+    # Binary values in the bytea hex format
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()
+
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return str(value)
+
+    return '"' + str(value).replace('"', '""') + '"'
+
+def copy_to_staging(cursor, stage: str, columns: list, rows: list) -> None:
+    """
+
+    :param cursor:
+    :param stage:
+    :param columns:
+    :param rows:
+    :return:
+    """
+
+    buffer = io.StringIO()
+
+    buffer.writelines(",".join(copy_field(value) for value in row) + "\n" for row in rows)
+
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        "COPY " + stage + " (" + ", ".join(columns) + ") FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buffer
+    )
+
+def advance_watermark(watermark_table: str, table_key: str, watermark: str) -> bool:
+    """
+    Records the last loaded value of the table. An older value is ignored, so a late retry never moves it back.
+
+    :param watermark_table: DynamoDB table with the watermarks
+    :param table_key: "<schema>.<table>"
+    :param watermark: end of the loaded window
+    :return: True if the watermark was advanced
+    """
+
+    try:
+        boto3.resource("dynamodb").Table(watermark_table).update_item(
+            Key={"table_key": table_key},
+            UpdateExpression="SET watermark = :watermark, updated_at = :updated_at",
+            ConditionExpression="attribute_not_exists(watermark) OR watermark < :watermark",
+            ExpressionAttributeValues={":watermark": watermark, ":updated_at": datetime.utcnow().isoformat()}
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logger.info(f"Watermark of {table_key} is already at or after {watermark}")
+        return False
+
+    logger.info(f"Watermark of {table_key} advanced to {watermark}")
+
+    return True
+
+
+def open_parquet_files(s3_fs: fs.S3FileSystem, base_path: str) -> list:
+    """
+    Opens the parquet of the window, or its part files when it was extracted in slices.
+
+    :param s3_fs:
+    :param base_path: "<bucket>/<db>/<table>/<window>", without extension
+    :return: list of ParquetFile, only their footers are read here
+    """
+
+    if s3_fs.get_file_info(f"{base_path}.parquet").type == fs.FileType.File:
+
+        return [pq.ParquetFile(s3_fs.open_input_file(f"{base_path}.parquet"))]
+
+    parts = sorted(
+        info.path for info in s3_fs.get_file_info(fs.FileSelector(base_path))
+        if info.type == fs.FileType.File and info.path.endswith(".parquet")
+    )
+
+    if not parts:
+
+        raise FileNotFoundError(f"No parquet found for {base_path}")
+
+    return [pq.ParquetFile(s3_fs.open_input_file(part)) for part in parts]
+
+
 def lambda_handler(event, context):
     """
 
@@ -98,6 +275,12 @@ def lambda_handler(event, context):
     interval = event["interval"]
     constraint_conflict = event["constraint_conflict"]
 
+    # "copy" loads through a staging table, "row" keeps the row by row upsert
+    load_mode = event.get("load_mode", "copy")
+
+    # Number of rows read from the parquet and sent to the database at a time
+    batch_size = event.get("batch_size", 50000)
+
     # Database credential data
     host = event["host"]
     port = event["port"]
@@ -109,22 +292,16 @@ def lambda_handler(event, context):
 
         dt_strings = compute_datetime(airflow_ts=exec_dt, interval=interval)
 
-        # Reading the parquet file
-        parquet_df = wr.s3.read_parquet(
-            path=[f"s3://{bucket}/{db}/{table_name}/{dt_strings['actual_ds_str']}.parquet"],
-            dataset=False,
-            use_threads=True
+        parquet_files = open_parquet_files(
+            s3_fs=fs.S3FileSystem(),
+            base_path=f"{bucket}/{db}/{table_name}/{dt_strings['actual_ds_str']}"
         )
 
-        pqt_dct = parquet_df.to_dict(orient="split")
+        columns = parquet_files[0].schema_arrow.names
 
-        # Cleaning the memory
-        del parquet_df
-
-        generated_query = generate_query(
-            constraint_conflict=constraint_conflict,
-            table=table_name,
-            columns=pqt_dct["columns"]
+        logger.info(
+            f"{len(parquet_files)} parquet files with "
+            f"{sum(parquet_file.metadata.num_rows for parquet_file in parquet_files)} rows"
         )
 
         conn = psycopg2.connect(
@@ -137,14 +314,81 @@ def lambda_handler(event, context):
 
         cursor = conn.cursor()
 
-        for row in pqt_dct["data"]:
+        if load_mode == "row":
+
+            generated_query = generate_query(
+                constraint_conflict=constraint_conflict,
+                table=table_name,
+                columns=columns
+            )
+
+        else:
+
+            # Resolved before staging, so an unknown constraint fails before any row is sent
+            key_columns = None
+            if constraint_conflict.strip().upper().startswith("ON CONSTRAINT"):
+                key_columns = constraint_columns(
+                    cursor=cursor, table=table_name, constraint_conflict=constraint_conflict
+                )
+
+            stage = f"stage_{table_name.replace('.', '_')}"
+
+            # The staging table is dropped with the commit
+            cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP")
+
+        loaded = 0
+
+        # Each batch is sent to the database before the next one is read
+        batches = (
+            batch
+            for parquet_file in parquet_files
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+        )
+
+        for batch in batches:
+
+            rows = list(zip(*(column.to_pylist() for column in batch.columns)))
 
-            cursor.execute(query=generated_query, vars=tuple(row))
+            if load_mode == "row":
+
+                for row in rows:
+
+                    cursor.execute(query=generated_query, vars=row)
+
+            else:
+
+                copy_to_staging(cursor=cursor, stage=stage, columns=columns, rows=rows)
+
+            loaded += len(rows)
+
+            logger.info(f"Batch of {len(rows)} rows sent, {loaded} rows in total")
+
+        if load_mode != "row":
+
+            cursor.execute(
+                generate_staging_upsert(
+                    constraint_conflict=constraint_conflict,
+                    table=table_name,
+                    stage=stage,
+                    columns=columns,
+                    key_columns=key_columns
+                )
+            )
+
+            logger.info(f"{loaded} staged rows merged into {table_name}")
 
         conn.commit()
 
         conn.close()
 
+        # Only advanced after the commit, so a failed load is extracted again by the next run
+        if event.get("watermark_table"):
+            advance_watermark(
+                watermark_table=event["watermark_table"],
+                table_key=f"{event['schema']}.{table_name}",
+                watermark=dt_strings["actual_ds_str"]
+            )
+
         return True
 
     except Exception as e:
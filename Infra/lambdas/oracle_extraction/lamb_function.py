@@ -1,9 +1,20 @@
 import boto3
 import cx_Oracle
 import csv
+import decimal
+import io
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+# Only the parquet output needs pyarrow, the csv extraction runs without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
 # Create and configure logger
 logging.basicConfig(
     # filename="newfile.log",
@@ -54,6 +65,507 @@ def compute_datetime(airflow_ts=str, interval=str) -> dict:
     return {"actual_ds_str": actual_ds_str, "prev_ds_str": prev_ds_str}
 
 
+def apply_watermark(dt_strings: dict, watermark_table: str, schema: str, table_name: str) -> dict:
+    """
+    Starts the window right after the last loaded value of the table, so every run pulls the new rows exactly once
+    and a missed run is covered by the next one.
+
+    :param dt_strings: window returned by compute_datetime
+    :param watermark_table: DynamoDB table with the watermarks, keyed by "<schema>.<table>"
+    :param schema:
+    :param table_name:
+    :return: the window, with an exclusive start when the table has a watermark
+    """
+
+    item = boto3.resource("dynamodb").Table(watermark_table).get_item(
+        Key={"table_key": f"{schema}.{table_name}"}
+    ).get("Item")
+
+    # Tables never loaded keep the window of the execution
+    if item is None:
+        logger.info(f"No watermark for {schema}.{table_name}, using the execution window")
+        return dt_strings
+
+    logger.info(f"Watermark of {schema}.{table_name}: {item['watermark']}")
+
+    return {**dt_strings, "prev_ds_str": item["watermark"], "exclusive_start": True}
+
+
+class MultipartWriter:
+    """
+    Writable object that uploads its content to S3 in parts, in a background thread, while it is written.
+    """
+
+    # S3 does not accept parts smaller than 5 MiB, except the last one
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, bucket: str, key: str, part_size: int = 16 * 1024 * 1024, max_pending: int = 2):
+        """
+
+        :param bucket:
+        :param key:
+        :param part_size: size of each uploaded part
+        :param max_pending: parts being uploaded at the same time, the memory used is about
+            (max_pending + 1) * part_size
+        """
+
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.max_pending = max_pending
+
+        self._buffer = io.BytesIO()
+        self._upload_id = None
+        self._futures = []
+        self._executor = ThreadPoolExecutor(max_workers=max_pending)
+        self._position = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def write(self, data) -> int:
+
+        written = self._buffer.write(data)
+        self._position += written
+
+        if self._buffer.tell() >= self.part_size:
+            self._submit_part()
+
+        return written
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict:
+
+        response = s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=part_number, Body=body
+        )
+
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def _submit_part(self):
+
+        if self._upload_id is None:
+            self._upload_id = s3.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+
+        # Waiting for the oldest upload, so at most 'max_pending' parts are kept in memory
+        pending = [future for future in self._futures if not future.done()]
+        if len(pending) >= self.max_pending:
+            pending[0].result()
+
+        self._futures.append(
+            self._executor.submit(self._upload_part, len(self._futures) + 1, self._buffer.getvalue())
+        )
+        logger.debug(f"Part {len(self._futures)} of {self.key} submitted")
+
+        self._buffer = io.BytesIO()
+
+    def close(self):
+
+        if self.closed:
+            return
+
+        try:
+
+            if self._upload_id is None:
+
+                # Small objects are sent in a single request
+                s3.put_object(Bucket=self.bucket, Key=self.key, Body=self._buffer.getvalue())
+
+            else:
+
+                if self._buffer.tell() > 0:
+                    self._submit_part()
+
+                parts = [future.result() for future in self._futures]
+
+                s3.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": parts}
+                )
+
+        except Exception:
+            self.abort()
+            raise
+
+        self._executor.shutdown()
+        self.closed = True
+        logger.info(f"{self._position} bytes written in s3://{self.bucket}/{self.key}")
+
+    def abort(self):
+
+        self._executor.shutdown(wait=True)
+
+        if self._upload_id is not None:
+            s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+
+        self.closed = True
+
+
+def extract_streaming(oracle_cursor, query: str, bucket: str, key: str, chunk_size: int) -> int:
+    """
+    Fetches the query in chunks and writes each one straight into an S3 multipart upload.
+
+    :param oracle_cursor:
+    :param query:
+    :param bucket:
+    :param key:
+    :param chunk_size: rows per fetchmany, also used as arraysize and prefetchrows
+    :return: number of rows extracted
+    """
+
+    # Rows transferred from the database per round trip
+    oracle_cursor.arraysize = chunk_size
+    oracle_cursor.prefetchrows = chunk_size + 1
+
+    oracle_cursor.execute(query)
+
+    # The header follows the order of the selected columns
+    header = [column[0] for column in oracle_cursor.description]
+    logger.debug(f"Header: {header}")
+
+    rows = oracle_cursor.fetchmany(chunk_size)
+
+    # Checking if there are data to be extracted
+    if not rows:
+        logger.info("There aren't data to be extracted")
+        return 0
+
+    total = 0
+
+    with MultipartWriter(bucket=bucket, key=key) as writer:
+
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer, delimiter=";")
+        csv_writer.writerow(header)
+
+        while rows:
+
+            csv_writer.writerows(rows)
+            total += len(rows)
+
+            # The upload of the previous parts overlaps with the next fetch
+            writer.write(buffer.getvalue().encode("UTF8"))
+            buffer.seek(0)
+            buffer.truncate()
+
+            logger.debug(f"{total} rows written")
+
+            rows = oracle_cursor.fetchmany(chunk_size)
+
+    logger.info(f"{total} rows extracted into s3://{bucket}/{key}")
+
+    return total
+
+
+def number_type(precision: int, scale: int) -> "pa.DataType":
+    """
+    Maps an Oracle NUMBER into an Arrow type without losing digits.
+
+    :param precision: declared precision, 0 when the NUMBER is unconstrained
+    :param scale: declared scale, -127 for unconstrained NUMBER and FLOAT
+    :return: Arrow type
+    """
+
+    # Unconstrained NUMBER, any precision and scale, is kept as its text
+    if not precision and scale == -127:
+        return pa.string()
+
+    # FLOAT(p) is a binary precision number
+    if scale == -127:
+        return pa.float64()
+
+    # Integers that fit into 64 bits
+    if scale == 0 and precision <= 18:
+        return pa.int64()
+
+    return pa.decimal128(precision, scale)
+
+
+def output_type_handler(cursor, name, default_type, size, precision, scale):
+    """
+    Fetches the NUMBER columns mapped to decimal as Decimal and the unconstrained ones as text, instead of float.
+    """
+
+    if default_type is not cx_Oracle.DB_TYPE_NUMBER:
+        return None
+
+    arrow_type = number_type(precision=precision, scale=scale)
+
+    if pa.types.is_decimal(arrow_type):
+        return cursor.var(decimal.Decimal, arraysize=cursor.arraysize)
+
+    if pa.types.is_string(arrow_type):
+        return cursor.var(str, 255, arraysize=cursor.arraysize)
+
+    return None
+
+
+def arrow_schema(description: list) -> "pa.Schema":
+    """
+    Maps the Oracle columns of a cursor description into Arrow types.
+
+    :param description: cursor.description, tuples (name, type, display_size, internal_size, precision, scale, null_ok)
+    :return: Arrow schema
+    """
+
+    fields = []
+
+    for name, db_type, _, _, precision, scale, _ in description:
+
+        if db_type is cx_Oracle.DB_TYPE_NUMBER:
+            arrow_type = number_type(precision=precision, scale=scale)
+        elif db_type in (cx_Oracle.DB_TYPE_BINARY_DOUBLE, cx_Oracle.DB_TYPE_BINARY_FLOAT):
+            arrow_type = pa.float64()
+        elif db_type in (
+            cx_Oracle.DB_TYPE_DATE,
+            cx_Oracle.DB_TYPE_TIMESTAMP,
+            cx_Oracle.DB_TYPE_TIMESTAMP_TZ,
+            cx_Oracle.DB_TYPE_TIMESTAMP_LTZ
+        ):
+            # cx_Oracle returns the zoned timestamps as naive values, without converting them to UTC
+            arrow_type = pa.timestamp("us")
+        elif db_type in (cx_Oracle.DB_TYPE_RAW, cx_Oracle.DB_TYPE_LONG_RAW, cx_Oracle.DB_TYPE_BLOB):
+            arrow_type = pa.binary()
+        else:
+            arrow_type = pa.string()
+
+        fields.append(pa.field(name, arrow_type))
+
+    return pa.schema(fields)
+
+
+def rows_to_batch(rows: list, schema: "pa.Schema") -> "pa.RecordBatch":
+    """
+    Builds an Arrow record batch from a chunk of fetched rows.
+
+    :param rows: list of tuples
+    :param schema: Arrow schema of the columns
+    :return: record batch
+    """
+
+    arrays = []
+
+    for values, field in zip(zip(*rows), schema):
+
+        # LOBs are fetched as locators and must be read
+        if any(hasattr(value, "read") for value in values):
+            values = [value.read() if hasattr(value, "read") else value for value in values]
+
+        arrays.append(pa.array(values, type=field.type))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def extract_parquet(oracle_cursor, query: str, bucket: str, key: str, chunk_size: int) -> int:
+    """
+    Fetches the query in chunks and writes each one as a Parquet row group straight into an S3 multipart upload.
+
+    :param oracle_cursor:
+    :param query:
+    :param bucket:
+    :param key:
+    :param chunk_size: rows per fetchmany, also used as arraysize and prefetchrows
+    :return: number of rows extracted
+    """
+
+    # Rows transferred from the database per round trip
+    oracle_cursor.arraysize = chunk_size
+    oracle_cursor.prefetchrows = chunk_size + 1
+
+    # The NUMBER columns are fetched in the representation of their Arrow type
+    oracle_cursor.outputtypehandler = output_type_handler
+
+    oracle_cursor.execute(query)
+
+    schema = arrow_schema(oracle_cursor.description)
+    logger.debug(f"Schema: {schema}")
+
+    rows = oracle_cursor.fetchmany(chunk_size)
+
+    # Checking if there are data to be extracted
+    if not rows:
+        logger.info("There aren't data to be extracted")
+        return 0
+
+    total = 0
+
+    with MultipartWriter(bucket=bucket, key=key) as writer:
+
+        with pq.ParquetWriter(writer, schema, compression="snappy") as parquet_writer:
+
+            while rows:
+
+                parquet_writer.write_table(pa.Table.from_batches([rows_to_batch(rows=rows, schema=schema)]))
+                total += len(rows)
+
+                logger.debug(f"{total} rows written")
+
+                rows = oracle_cursor.fetchmany(chunk_size)
+
+    logger.info(f"{total} rows extracted into s3://{bucket}/{key}")
+
+    return total
+
+
+def open_connection(host: str, port: str, tns: str, user: str, psswd: str):
+    """
+
+    :param host:
+    :param port:
+    :param tns:
+    :param user:
+    :param psswd:
+    :return: Oracle connection
+    """
+
+    dsn_tns = cx_Oracle.makedsn(host, port, service_name=tns)
+
+    return cx_Oracle.connect(user=user, password=psswd, dsn=dsn_tns, encoding="UTF-8", threaded=True)
+
+
+def slice_conditions(upsert_col: str, dt_strings: dict, slices: int, strategy: str) -> list:
+    """
+    Splits the extraction window into sub-ranges.
+
+    :param upsert_col:
+    :param dt_strings: window returned by compute_datetime or apply_watermark
+    :param slices: number of sub-ranges
+    :param strategy: "time" splits the upsert_col window in equal intervals, "hash" buckets the rows by ROWID
+    :return: list with the WHERE condition of each slice
+    """
+
+    ts_format = "%Y-%m-%d %H:%M:%S"
+    start = datetime.strptime(dt_strings["prev_ds_str"], ts_format)
+    end = datetime.strptime(dt_strings["actual_ds_str"], ts_format)
+
+    # The start of a window coming from a watermark was already loaded
+    start_op = ">" if dt_strings.get("exclusive_start") else ">="
+
+    def to_timestamp(value: datetime) -> str:
+        return f"TO_TIMESTAMP('{value.strftime(ts_format)}', 'yyyy-mm-dd hh24:mi:ss')"
+
+    if strategy == "hash":
+
+        window = f"{upsert_col} {start_op} {to_timestamp(start)} AND {upsert_col} <= {to_timestamp(end)}"
+
+        return [f"{window} AND ORA_HASH(ROWID, {slices - 1}) = {i}" for i in range(slices)]
+
+    step = (end - start) / slices
+    bounds = [start + step * i for i in range(slices)] + [end]
+
+    # The last slice keeps the inclusive upper bound of the window
+    return [
+        f"{upsert_col} {start_op if i == 0 else '>='} {to_timestamp(bounds[i])} AND {upsert_col} {'<=' if i == slices - 1 else '<'} "
+        f"{to_timestamp(bounds[i + 1])}"
+        for i in range(slices)
+    ]
+
+
+def delete_stale_parts(bucket: str, prefix: str, slices: int, indexes: list) -> None:
+    """
+    Deletes the part files of a previous run of the window, so a rerun never leaves parts that are loaded again.
+
+    :param bucket:
+    :param prefix: "<window>" directory of the parts
+    :param slices: total number of slices of the window
+    :param indexes: slices extracted by this invocation, the other slices of the window are kept
+    """
+
+    stale = []
+
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=f"{prefix}/part-"):
+        for content in page.get("Contents", []):
+            index = int(content["Key"].rsplit("/part-", 1)[-1].split(".")[0])
+            # Parts of this invocation and parts beyond the current number of slices
+            if index in indexes or index >= slices:
+                stale.append(content["Key"])
+
+    # delete_objects accepts up to 1000 keys per request
+    for start in range(0, len(stale), 1000):
+        s3.delete_objects(
+            Bucket=bucket, Delete={"Objects": [{"Key": key} for key in stale[start:start + 1000]], "Quiet": True}
+        )
+
+    if stale:
+        logger.info(f"{len(stale)} stale parts deleted from s3://{bucket}/{prefix}/")
+
+
+def extract_slices(event: dict, dt_strings: dict, slices: int, indexes: list, output_format: str, chunk_size: int) -> int:
+    """
+    Extracts several slices of the window concurrently, each one on its own connection and into its own part file.
+
+    :param event:
+    :param dt_strings:
+    :param slices: total number of slices of the window
+    :param indexes: slices extracted by this invocation
+    :param output_format: "csv" or "parquet"
+    :param chunk_size:
+    :return: number of rows extracted
+    """
+
+    conditions = slice_conditions(
+        upsert_col=event["upsert_col"],
+        dt_strings=dt_strings,
+        slices=slices,
+        strategy=event.get("slice_strategy", "time")
+    )
+
+    if output_format == "parquet":
+        bucket = event["target_bucket"]
+        prefix = f"{event['schema']}/{event['table_name']}/{dt_strings['actual_ds_str']}"
+        extract = extract_parquet
+    else:
+        bucket = event["bucket"]
+        prefix = f"{event['bucket_path']}/{dt_strings['actual_ds_str']}"
+        extract = extract_streaming
+
+    delete_stale_parts(bucket=bucket, prefix=prefix, slices=slices, indexes=indexes)
+
+    def run(index: int) -> int:
+
+        conn = open_connection(
+            host=event["host"], port=event["port"], tns=event["tns"], user=event["user"], psswd=event["psswd"]
+        )
+
+        try:
+            logger.info(f"Extracting slice {index + 1} of {slices}")
+            return extract(
+                oracle_cursor=conn.cursor(),
+                query=f"SELECT * FROM {event['schema']}.{event['table_name']} WHERE {conditions[index]}",
+                bucket=bucket,
+                key=f"{prefix}/part-{index:04d}.{output_format}",
+                chunk_size=chunk_size
+            )
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=len(indexes)) as executor:
+        total = sum(executor.map(run, indexes))
+
+    logger.info(f"{total} rows extracted in {len(indexes)} slices")
+
+    return total
+
+
 def lambda_handler(event, context):
     """
 
@@ -71,6 +583,21 @@ def lambda_handler(event, context):
     exec_dt = event["dt_execution"]
     interval = event["interval"]
 
+    # "stream" fetches in chunks straight into S3, "fetchall" keeps the /tmp CSV path
+    extraction_mode = event.get("extraction_mode", "stream")
+    chunk_size = event.get("chunk_size", 10000)
+
+    # "parquet" writes typed Parquet into the target bucket, skipping the transform lambda
+    output_format = event.get("output_format", "csv")
+
+    if output_format == "parquet" and pa is None:
+        raise ImportError("The parquet output requires the pyarrow package in the lambda runtime.")
+
+    # Number of sub-ranges of the window, each one written in its own part file under "<window>/"
+    slices = event.get("slices", 1)
+    # When given, only this slice is extracted, so the slices can be fanned out across invocations
+    slice_index = event.get("slice_index")
+
     # Database credential data
     host = event["host"]
     port = event["port"]
@@ -81,80 +608,133 @@ def lambda_handler(event, context):
     # Getting the datetimes
     dt_strings = compute_datetime(airflow_ts=exec_dt, interval=interval)
 
+    # The load lambda advances the watermark once the window is loaded
+    if event.get("watermark_table"):
+
+        dt_strings = apply_watermark(
+            dt_strings=dt_strings, watermark_table=event["watermark_table"], schema=schema, table_name=table_name
+        )
+
+        if dt_strings["prev_ds_str"] >= dt_strings["actual_ds_str"]:
+            logger.info(f"{schema}.{table_name} is already loaded up to {dt_strings['prev_ds_str']}")
+            return 0
+
+    if slices > 1:
+
+        try:
+
+            return extract_slices(
+                event=event,
+                dt_strings=dt_strings,
+                slices=slices,
+                indexes=list(range(slices)) if slice_index is None else [slice_index],
+                output_format=output_format,
+                chunk_size=chunk_size
+            )
+
+        except Exception as e:
+
+            logger.debug(
+                f"Table: {table_name} - Bucket: {bucket} - Execution datetime: {exec_dt}"
+            )
+
+            logger.error(e)
+
+            # Failing the task, so the parts of the other slices are not loaded as the whole window
+            raise
+
     try:
 
         logger.info("Opening the connection")
-        dsn_tns = cx_Oracle.makedsn(host, port, service_name=tns)
-        print(f"TNS: {dsn_tns}")
-
-        conn = cx_Oracle.connect(
-            user=user,
-            password=psswd,
-            dsn=dsn_tns,
-            encoding="UTF-8"
-        )
+        conn = open_connection(host=host, port=port, tns=tns, user=user, psswd=psswd)
         print(f"conn: {conn}")
 
         logger.info("Creating the cursor")
         oracle_cursor = conn.cursor()
 
-        # Getting the name of the columns
-        logger.info("Getting the table's columns")
-        oracle_cursor.execute(f"SELECT column_name FROM USER_TAB_COLUMNS WHERE table_name = '{table_name}'")
-        header_raw = oracle_cursor.fetchall()
-        print(f"header: {header_raw}")
-
-        header = [cn[0] for cn in header_raw]
-        # print(f"Header: {header}")
-        logger.debug(f"Header: {header}")
-
         # Creating the CSV file name
         logger.info("Creating the CSV file name")
         csv_path = f"{bucket_path}/{dt_strings['actual_ds_str']}.csv"
         logger.debug(f"CSV file name: {csv_path}")
-        # print(f"CSV file name: {csv_path}")
-        # print(f"dt_formated_to_oracle: {dt_formated_to_oracle}")
 
-        logger.info("Get the data from the table")
-        oracle_cursor.execute(
-            f"SELECT * FROM {schema}.{table_name} WHERE {upsert_col} >= TO_TIMESTAMP('{dt_strings['prev_ds_str']}', 'yyyy-mm-dd hh24:mi:ss') AND {upsert_col} <= TO_TIMESTAMP('{dt_strings['actual_ds_str']}', 'yyyy-mm-dd hh24:mi:ss')"
-        )
+        start_op = ">" if dt_strings.get("exclusive_start") else ">="
 
-        raw_data = oracle_cursor.fetchall()
-        # raw_data = oracle_cursor.fetchmany(10000)
-        # print(f"raw_data: {raw_data}")
+        query = f"SELECT * FROM {schema}.{table_name} WHERE {upsert_col} {start_op} TO_TIMESTAMP('{dt_strings['prev_ds_str']}', 'yyyy-mm-dd hh24:mi:ss') AND {upsert_col} <= TO_TIMESTAMP('{dt_strings['actual_ds_str']}', 'yyyy-mm-dd hh24:mi:ss')"
 
-        # Checking if there are data to be extracted
-        if len(raw_data) > 0:
+        if output_format == "parquet":
 
-            # Listing the values
-            ls_data = [list(row) for row in raw_data]
-            logger.debug(f"First row: {ls_data[0]}")
-            logger.debug(f"Second row: {ls_data[1]}")
+            # Same path written by the transform lambda
+            parquet_path = f"{schema}/{table_name}/{dt_strings['actual_ds_str']}.parquet"
 
-            with open(f"/tmp/{schema}-{table_name}-data.csv", "a", encoding="UTF8", newline="") as raw_file:
+            logger.info("Streaming the data from the table as Parquet")
+            extract_parquet(
+                oracle_cursor=oracle_cursor,
+                query=query,
+                bucket=event["target_bucket"],
+                key=parquet_path,
+                chunk_size=chunk_size
+            )
 
-                # Creating the csv writer
-                csv_writer = csv.writer(raw_file, delimiter=";")
-                logger.debug("CSV writer created")
+        elif extraction_mode == "stream":
 
-                # To writing the header
-                csv_writer.writerow(header)
-                logger.debug("CSV header written")
+            logger.info("Streaming the data from the table")
+            extract_streaming(
+                oracle_cursor=oracle_cursor, query=query, bucket=bucket, key=csv_path, chunk_size=chunk_size
+            )
 
-                # # To writing the data
-                csv_writer.writerows(ls_data)
-                logger.debug("CSV data written")
-                # print(f"Raw data: {ls_data}")
+        else:
 
-                raw_file.close()
-                logger.debug("CSV file closed")
+            # Getting the name of the columns
+            logger.info("Getting the table's columns")
+            oracle_cursor.execute(f"SELECT column_name FROM USER_TAB_COLUMNS WHERE table_name = '{table_name}'")
+            header_raw = oracle_cursor.fetchall()
+            print(f"header: {header_raw}")
 
-            s3.upload_file(f"/tmp/{schema}-{table_name}-data.csv", bucket, csv_path)
+            header = [cn[0] for cn in header_raw]
+            # print(f"Header: {header}")
+            logger.debug(f"Header: {header}")
 
-        else:
+            # print(f"CSV file name: {csv_path}")
+            # print(f"dt_formated_to_oracle: {dt_formated_to_oracle}")
+
+            logger.info("Get the data from the table")
+            oracle_cursor.execute(query)
+
+            raw_data = oracle_cursor.fetchall()
+            # raw_data = oracle_cursor.fetchmany(10000)
+            # print(f"raw_data: {raw_data}")
+
+            # Checking if there are data to be extracted
+            if len(raw_data) > 0:
+
+                # Listing the values
+                ls_data = [list(row) for row in raw_data]
+                logger.debug(f"First row: {ls_data[0]}")
+                logger.debug(f"Second row: {ls_data[1]}")
+
+                with open(f"/tmp/{schema}-{table_name}-data.csv", "a", encoding="UTF8", newline="") as raw_file:
+
+                    # Creating the csv writer
+                    csv_writer = csv.writer(raw_file, delimiter=";")
+                    logger.debug("CSV writer created")
+
+                    # To writing the header
+                    csv_writer.writerow(header)
+                    logger.debug("CSV header written")
+
+                    # # To writing the data
+                    csv_writer.writerows(ls_data)
+                    logger.debug("CSV data written")
+                    # print(f"Raw data: {ls_data}")
+
+                    raw_file.close()
+                    logger.debug("CSV file closed")
+
+                s3.upload_file(f"/tmp/{schema}-{table_name}-data.csv", bucket, csv_path)
+
+            else:
 
-            logger.info("There aren't data to be extracted")
+                logger.info("There aren't data to be extracted")
 
         logger.info("Closing the DB connection")
         conn.close()
@@ -1,6 +1,10 @@
 import awswrangler as wr
 import logging
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
+from pyarrow import csv as pa_csv
+from pyarrow import fs
 
 # Create and configure logger
 logging.basicConfig(
@@ -50,6 +54,74 @@ def compute_datetime(airflow_ts=str, interval=str) -> dict:
     return {"actual_ds_str": actual_ds_str, "prev_ds_str": prev_ds_str}
 
 
+def stream_csv_to_parquet(
+    s3_fs: fs.S3FileSystem,
+    csv_path: str,
+    parquet_path: str,
+    column_types: dict = None,
+    block_size: int = 16 * 1024 * 1024
+) -> int:
+    """
+    Converts a csv into parquet block by block, each parsed block is written as a row group.
+
+    :param s3_fs:
+    :param csv_path: "<bucket>/<key>" of the csv
+    :param parquet_path: "<bucket>/<key>" of the parquet
+    :param column_types: column name mapped to an Arrow type alias, e.g. {"ID": "int64"}. The columns not given are
+                         inferred from the first block, so a later block with another type fails the conversion.
+                         Columns without values in the first block are read as string
+    :param block_size: bytes parsed at a time, peak memory is a few blocks
+    :return: number of rows converted
+    """
+
+    column_types = {name: pa.type_for_alias(alias) for name, alias in (column_types or {}).items()}
+
+    def open_reader(source):
+
+        return pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(block_size=block_size),
+            parse_options=pa_csv.ParseOptions(delimiter=";"),
+            # Empty fields are NULLs in every column, as in the pandas mode
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True
+            )
+        )
+
+    # A column empty in the whole first block is inferred as null, so it is read as string instead
+    with s3_fs.open_input_stream(csv_path) as source:
+
+        null_columns = [field.name for field in open_reader(source).schema if pa.types.is_null(field.type)]
+
+    if null_columns:
+
+        logger.info(f"Columns without values in the first block read as string: {null_columns}")
+        column_types.update({name: pa.string() for name in null_columns})
+
+    total = 0
+
+    with s3_fs.open_input_stream(csv_path) as source:
+
+        reader = open_reader(source)
+
+        with s3_fs.open_output_stream(parquet_path) as sink:
+
+            with pq.ParquetWriter(sink, reader.schema, compression="snappy") as writer:
+
+                for batch in reader:
+
+                    writer.write_table(pa.Table.from_batches([batch]))
+                    total += batch.num_rows
+
+                    logger.debug(f"{total} rows converted")
+
+    logger.info(f"{total} rows converted from s3://{csv_path} into s3://{parquet_path}")
+
+    return total
+
+
 def lambda_handler(event, context):
 
     # S3 Infos
@@ -60,31 +132,71 @@ def lambda_handler(event, context):
     table_name = event["table_name"]
     interval = event["interval"]
 
+    # "stream" converts block by block with constant memory, "pandas" loads the whole csv in a DataFrame
+    column_types = event.get("column_types")
+    # Streaming relies on the column types, without them the types are inferred by pandas over the whole csv
+    transform_mode = event.get("transform_mode", "stream" if column_types else "pandas")
+    block_size = event.get("block_size", 16 * 1024 * 1024)
+
     formatted_exec_obj = compute_datetime(airflow_ts=dt_execution, interval=interval)
 
     # Getting the CSV file name
     csv_name = f"{formatted_exec_obj['actual_ds_str']}.csv"
     print(f"csv_name: {csv_name}")
 
+    base_path = f"s3://{source_bucket}/{schema}/{table_name}/{formatted_exec_obj['actual_ds_str']}"
+    target_path = f"s3://{target_bucket}/{schema}/{table_name}/{formatted_exec_obj['actual_ds_str']}"
+
     try:
 
-        csv_df = wr.s3.read_csv(path=f"s3://{source_bucket}/{schema}/{table_name}/{csv_name}", sep=";")
-        print(csv_df)
-
-        # Creating the file name
-        #pqt_path_name = f"{formatted_exec_obj}.parquet"
-        #print(f"parquet name: {pqt_path_name}")
-        # logger.debug(f"File name: {pqt_path_name}")
-
-        # Converting the csv into parquet file
-        parquet_wrote = wr.s3.to_parquet(
-            df=csv_df,
-            path=f"s3://{target_bucket}/{schema}/{table_name}/{formatted_exec_obj['actual_ds_str']}.parquet",
-            index=False,
-            dataset=False,
-            compression="snappy"
-        )
-        print(f"parquet_wrote: {parquet_wrote}")
+        # A window extracted in slices has one csv per slice under "<window>/"
+        if wr.s3.does_object_exist(path=f"{base_path}.csv"):
+
+            conversions = [(f"{base_path}.csv", f"{target_path}.parquet")]
+
+        else:
+
+            conversions = [
+                (csv_path, f"{target_path}/{csv_path.split('/')[-1][:-len('.csv')]}.parquet")
+                for csv_path in sorted(wr.s3.list_objects(path=f"{base_path}/", suffix=".csv"))
+            ]
+
+            # Parquet parts of a previous run that has no csv part now would be loaded again
+            stale = set(wr.s3.list_objects(path=f"{target_path}/", suffix=".parquet")) - {
+                parquet_path for _, parquet_path in conversions
+            }
+
+            if stale:
+                wr.s3.delete_objects(path=sorted(stale))
+                logger.info(f"{len(stale)} stale parquet parts deleted from {target_path}/")
+
+        for csv_path, parquet_path in conversions:
+
+            if transform_mode == "stream":
+
+                stream_csv_to_parquet(
+                    s3_fs=fs.S3FileSystem(),
+                    csv_path=csv_path[len("s3://"):],
+                    parquet_path=parquet_path[len("s3://"):],
+                    column_types=column_types,
+                    block_size=block_size
+                )
+
+                continue
+
+            csv_df = wr.s3.read_csv(path=csv_path, sep=";")
+            logger.info(f"csv with {len(csv_df)} rows read from {csv_path}")
+
+            # Converting the csv into parquet file
+            parquet_wrote = wr.s3.to_parquet(
+                df=csv_df,
+                path=parquet_path,
+                index=False,
+                dataset=False,
+                compression="snappy"
+            )
+            print(f"parquet_wrote: {parquet_wrote}")
+
         print("Step 3: upload done")
 
     except Exception as e: